@@ -1,11 +1,62 @@
+import cv2
 import numpy as np
 
+
+def warp(frame: np.ndarray, M: np.ndarray, size) -> np.ndarray:
+    """
+    Resamples frame with the 3x3 transform M into an image of the given (width, height).
+    Affine transforms use warpAffine, anything else warpPerspective. The identity returns the frame as is.
+    """
+    if np.array_equal(M, np.eye(3)) and frame.shape[1::-1] == tuple(size):
+        return frame
+    if np.array_equal(M[2], [0, 0, 1]):
+        return cv2.warpAffine(frame, M[:2], size)
+    return cv2.warpPerspective(frame, M, size)
+
+
+def translation_matrix(tx: float, ty: float) -> np.ndarray:
+    return np.array([[1, 0, tx], [0, 1, ty], [0, 0, 1]], dtype=np.float64)
+
+
+def to_3x3(M: np.ndarray) -> np.ndarray:
+    return np.vstack([M, [0.0, 0.0, 1.0]])
+
+
 class Aligner(object):
     def __init__(self):
         self.reference = None
 
     def set_reference(self, reference: np.ndarray):
         self.reference = reference
-    
+
+    def estimate(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Returns the 3x3 transform that maps frame onto the reference, or None if the frame cannot be aligned.
+        The first frame becomes the reference and gets the identity.
+        """
+        pass
+
+    def set_independent_frames(self):
+        """
+        Called when frames are estimated in no particular order, e.g. by AlignmentPool workers
+        that each see a subset of the frames. Aligners that carry state from one frame to the
+        next must stop doing so, so that each transform only depends on the frame and the reference.
+        """
+        pass
+
+    def set_threads(self, threads: int):
+        """
+        Limits the threads used to estimate a single frame, e.g. in AlignmentPool workers, which
+        already run in parallel with each other.
+        """
+        pass
+
+    def apply(self, frame: np.ndarray, M: np.ndarray) -> np.ndarray:
+        rows, cols = self.reference.shape[:2]
+        return warp(frame, M, (cols, rows))
+
     def align(self, frame: np.ndarray) -> np.ndarray:
-        pass
\ No newline at end of file
+        M = self.estimate(frame)
+        if M is None:
+            return None
+        return self.apply(frame, M)
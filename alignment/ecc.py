@@ -1,32 +1,109 @@
 from . import Aligner
 import cv2
 import numpy as np
+from thresholding import apply_threshold
+
+MOTION_MODELS = {
+    "translation": cv2.MOTION_TRANSLATION,
+    "euclidean": cv2.MOTION_EUCLIDEAN,
+    "affine": cv2.MOTION_AFFINE,
+    "homography": cv2.MOTION_HOMOGRAPHY,
+}
 
 
 class EccAligner(Aligner):
-    def __init__(self, threshold=0.0):
+    """
+    Aligns frames to the reference with ECC maximization, coarse to fine.
+    The warp is first estimated on the smallest level of an image pyramid and refined on each
+    larger level. When warm_start is set, each frame starts from the previous frame's warp; it is
+    turned off when frames are aligned in parallel, so that the transforms are deterministic.
+    Frames for which ECC does not converge are dropped.
+    """
+
+    def __init__(self, threshold=0.0, motion="affine", levels=3, iterations=50, epsilon=0.001, warm_start=True):
         super().__init__()
         self.threshold = threshold
+        self.motion = MOTION_MODELS[motion]
+        self.levels = max(1, levels)
+        self.iterations = iterations
+        self.epsilon = epsilon
+        self.warm_start = warm_start
+        self.reference_pyramid = None
+        self.previous_warp = None
+
+    def set_independent_frames(self):
+        self.warm_start = False
+        self.previous_warp = None
 
     def apply_threshold(self, frame):
-        converted_frame = cv2.cvtColor(frame.astype(np.uint8), cv2.COLOR_BGR2GRAY)
-        _, converted_frame = cv2.threshold(converted_frame, self.threshold, 255, cv2.THRESH_TOZERO)
-        return converted_frame
+        return apply_threshold(frame, self.threshold)
+
+    def _pyramid(self, gray):
+        pyramid = [gray]
+        # Stop before the coarsest level gets too small for ECC to be meaningful
+        while len(pyramid) < self.levels and min(pyramid[-1].shape) >= 64:
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+
+    def _identity(self):
+        if self.motion == cv2.MOTION_HOMOGRAPHY:
+            return np.eye(3, 3, dtype=np.float32)
+        return np.eye(2, 3, dtype=np.float32)
+
+    def _scale_warp(self, warp, factor):
+        warp = warp.copy()
+        warp[0, 2] *= factor
+        warp[1, 2] *= factor
+        if self.motion == cv2.MOTION_HOMOGRAPHY:
+            warp[2, 0] /= factor
+            warp[2, 1] /= factor
+        return warp
 
     def set_reference(self, reference):
         self.reference = self.apply_threshold(reference)
-    
-    def align(self, frame):
+        self.reference_pyramid = self._pyramid(self.reference)
+        self.previous_warp = None
+
+    def _find_warp(self, frame_pyramid, warp):
+        criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, self.iterations, self.epsilon)
+        levels = min(len(self.reference_pyramid), len(frame_pyramid))
+        warp = self._scale_warp(warp, 1.0 / 2 ** (levels - 1))
+        for level in reversed(range(levels)):
+            _, warp = cv2.findTransformECC(
+                self.reference_pyramid[level], frame_pyramid[level], warp, self.motion, criteria
+            )
+            if level > 0:
+                warp = self._scale_warp(warp, 2.0)
+        return warp
+
+    def estimate(self, frame):
         if self.reference is None:
             self.set_reference(frame)
-            return frame
+            return np.eye(3)
 
         # Convert the current frame to grayscale
-        gray_frame = self.apply_threshold(frame)
+        frame_pyramid = self._pyramid(self.apply_threshold(frame))
+
         # Estimate the geometric transformation that aligns the current frame to the reference frame
-        warp_matrix = np.eye(2, 3, dtype=np.float32)
-        criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 50, 0.001)
-        _, warp_matrix = cv2.findTransformECC(self.reference, gray_frame, warp_matrix, cv2.MOTION_AFFINE, criteria)
-        # Apply the transformation to the frame
-        rows, cols = frame.shape[:2]
-        return cv2.warpAffine(frame, warp_matrix, (cols, rows))
+        initial_warps = [self._identity()]
+        if self.warm_start and self.previous_warp is not None:
+            initial_warps.insert(0, self.previous_warp)
+
+        warp_matrix = None
+        for initial_warp in initial_warps:
+            try:
+                warp_matrix = self._find_warp(frame_pyramid, initial_warp)
+                break
+            except cv2.error:
+                continue
+
+        if warp_matrix is None:
+            print("Warning: ECC did not converge, cannot align frame.")
+            self.previous_warp = None
+            return None
+        self.previous_warp = warp_matrix
+
+        # ECC maps reference coordinates to frame coordinates, so the frame transform is its inverse
+        M = np.eye(3)
+        M[: warp_matrix.shape[0]] = warp_matrix
+        return np.linalg.inv(M)
@@ -0,0 +1,107 @@
+from . import Aligner
+import cv2
+import numpy as np
+
+
+class FeatureAligner(Aligner):
+    """
+    Aligns frames to the reference with a homography estimated from matched keypoints.
+    Reference features are computed once. Keypoints are detected on a copy of the thresholded
+    frame resized by scale, and the homography is rescaled to full resolution.
+    A homography is only accepted if at least min_inliers of the matches, and min_inlier_ratio of
+    them, are RANSAC inliers; otherwise the frame is not aligned.
+    Subclasses provide the detector, the descriptor norm and apply_threshold.
+    """
+
+    def __init__(self, threshold=0.0, scale=1.0, max_keypoints=5000, ratio=0.75, matcher="bf", min_inliers=15, min_inlier_ratio=0.2):
+        super().__init__()
+        self.threshold = threshold
+        self.scale = scale
+        self.max_keypoints = max_keypoints
+        self.ratio = ratio
+        self.min_inliers = min_inliers
+        self.min_inlier_ratio = min_inlier_ratio
+        self.ref_points = None
+        self.ref_descriptors = None
+        self.detector = self.create_detector()
+        self.matcher = self.create_matcher(matcher)
+
+    def create_detector(self):
+        pass
+
+    def create_matcher(self, matcher):
+        if matcher == "flann":
+            if self.norm() == cv2.NORM_HAMMING:
+                index_params = dict(algorithm=6, table_number=6, key_size=12, multi_probe_level=1)
+            else:
+                index_params = dict(algorithm=1, trees=5)
+            return cv2.FlannBasedMatcher(index_params, dict(checks=100))
+        return cv2.BFMatcher(self.norm())
+
+    def norm(self):
+        return cv2.NORM_L2
+
+    def apply_threshold(self, frame):
+        pass
+
+    def detect(self, gray):
+        """
+        Returns the keypoint coordinates at detection scale and their descriptors.
+        """
+        if self.scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        keypoints, descriptors = self.detector.detectAndCompute(gray, None)
+        if descriptors is None or len(keypoints) < 2:
+            return None, None
+        return cv2.KeyPoint_convert(keypoints), descriptors
+
+    def set_reference(self, reference):
+        self.reference = self.apply_threshold(reference)
+        self.ref_points, self.ref_descriptors = self.detect(self.reference)
+
+    def estimate_homography(self, gray_frame):
+        """
+        Returns the homography that maps gray_frame onto the reference, or None if there are not
+        enough good matches or too few of them agree with the homography.
+        """
+        if self.ref_descriptors is None:
+            return None
+        points, descriptors = self.detect(gray_frame)
+        if descriptors is None:
+            return None
+
+        matches = self.matcher.knnMatch(self.ref_descriptors, descriptors, k=2)
+        pairs = np.array(
+            [(m.queryIdx, m.trainIdx, m.distance, n.distance) for m, n in (p for p in matches if len(p) == 2)],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+
+        # Apply ratio test to find good matches
+        good = pairs[pairs[:, 2] < self.ratio * pairs[:, 3]]
+        if len(good) < max(4, self.min_inliers):
+            return None
+        reference_points = self.ref_points[good[:, 0].astype(np.intp)]
+        frame_points = points[good[:, 1].astype(np.intp)]
+
+        h, mask = cv2.findHomography(frame_points, reference_points, cv2.RANSAC)
+        if h is None:
+            return None
+        inliers = int(mask.sum())
+        if inliers < self.min_inliers or inliers < self.min_inlier_ratio * len(good):
+            return None
+        if self.scale == 1.0:
+            return h
+
+        # Convert the homography from detection scale to full resolution
+        S = np.diag([self.scale, self.scale, 1.0])
+        return np.linalg.inv(S) @ h @ S
+
+    def estimate(self, frame):
+        if self.reference is None:
+            self.set_reference(frame)
+            return np.eye(3)
+
+        h = self.estimate_homography(self.apply_threshold(frame))
+        if h is None:
+            print("Warning: Not enough feature matches, cannot align frame.")
+        return h
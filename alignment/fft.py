@@ -1,46 +1,90 @@
-from . import Aligner
-import cv2
+from . import Aligner, translation_matrix
 import numpy as np
-from scipy.ndimage import shift
+from thresholding import apply_threshold
+from scipy.fft import irfft2, next_fast_len, rfft2
 
 class FFTAligner(Aligner):
-    def __init__(self, threshold=0.0):
+    """
+    Aligns frames to the reference by phase correlation.
+    The reference spectrum is computed once, using real-input FFTs padded to a fast size. The
+    correlation peak is refined to sub-pixel precision with a parabolic fit, and the frame is
+    shifted with a single warp.
+    Each FFT runs on workers threads (-1 for every core).
+    """
+
+    def __init__(self, threshold=0.0, subpixel=True, workers=-1):
         super().__init__()
         self.threshold = threshold
+        self.subpixel = subpixel
+        self.workers = workers
+        self.reference_spectrum = None
+        self.fft_shape = None
+
+    def set_threads(self, threads: int):
+        self.workers = threads
 
     def apply_threshold(self, frame):
-        converted_frame = cv2.cvtColor(frame.astype(np.uint8), cv2.COLOR_BGR2GRAY)
-        _, converted_frame = cv2.threshold(
-            converted_frame, self.threshold, 255, cv2.THRESH_TOZERO
-        )
-        return converted_frame
+        return apply_threshold(frame, self.threshold)
 
     def set_reference(self, reference):
         self.reference = self.apply_threshold(reference)
+        rows, cols = self.reference.shape
+        self.fft_shape = (next_fast_len(rows, True), next_fast_len(cols, True))
+        self.reference_spectrum = rfft2(
+            self.reference.astype(np.float32), s=self.fft_shape, workers=self.workers
+        )
 
-    def align(self, frame):
-        if self.reference is None:
-            self.set_reference(frame)
-            return frame
+    def _refine(self, before, peak, after):
+        # Vertex of the parabola through the peak and its two neighbours
+        denominator = before - 2 * peak + after
+        if denominator == 0:
+            return 0.0
+        return float(np.clip(0.5 * (before - after) / denominator, -0.5, 0.5))
 
-        # Convert the current frame to grayscale
-        gray_frame = self.apply_threshold(frame)
+    def estimate_shift(self, gray_frame):
+        """
+        Returns the (shift_y, shift_x) that moves gray_frame onto the reference.
+        """
+        spectrum = rfft2(gray_frame.astype(np.float32), s=self.fft_shape, workers=self.workers)
 
-        # Compute the 2d FFTs
-        f1 = np.fft.fft2(self.reference)
-        f2 = np.fft.fft2(gray_frame)
+        # Compute the normalized cross power spectrum
+        cross_power_spectrum = self.reference_spectrum * np.conj(spectrum)
+        cross_power_spectrum /= np.abs(cross_power_spectrum) + 1e-12
 
-        # Compute the cross power spectrum
-        cross_power_spectrum = f1 * np.conj(f2)
-        cross_power_spectrum /= np.abs(cross_power_spectrum)
+        # The inverse FFT peaks at the translation
+        correlation = irfft2(cross_power_spectrum, s=self.fft_shape, workers=self.workers)
+        peak_y, peak_x = np.unravel_index(np.argmax(correlation), correlation.shape)
+        rows, cols = self.fft_shape
 
-        # Compute the inverse FFT to obtain the translation
-        translation = np.fft.ifft2(cross_power_spectrum).real
+        shift_y = float(peak_y)
+        shift_x = float(peak_x)
+        if self.subpixel:
+            shift_y += self._refine(
+                correlation[(peak_y - 1) % rows, peak_x],
+                correlation[peak_y, peak_x],
+                correlation[(peak_y + 1) % rows, peak_x],
+            )
+            shift_x += self._refine(
+                correlation[peak_y, (peak_x - 1) % cols],
+                correlation[peak_y, peak_x],
+                correlation[peak_y, (peak_x + 1) % cols],
+            )
 
-        # Find the peak of the translation to get the shift
-        shift_y, shift_x = np.unravel_index(np.argmax(translation), translation.shape)
+        # Peaks past the midpoint are negative shifts
+        if shift_y > rows / 2:
+            shift_y -= rows
+        if shift_x > cols / 2:
+            shift_x -= cols
+        return shift_y, shift_x
 
-        # Shift the original frame to align it with the reference
-        aligned_frame = shift(frame, [shift_y, shift_x, 0])
+    def estimate(self, frame):
+        if self.reference is None:
+            self.set_reference(frame)
+            return np.eye(3)
 
-        return aligned_frame
\ No newline at end of file
+        # Convert the current frame to grayscale
+        gray_frame = self.apply_threshold(frame)
+        shift_y, shift_x = self.estimate_shift(gray_frame)
+
+        # Shift the original frame to align it with the reference
+        return translation_matrix(shift_x, shift_y)
@@ -1,6 +1,7 @@
-from . import Aligner
+from . import Aligner, to_3x3, translation_matrix
 import cv2
 import numpy as np
+from thresholding import apply_threshold
 
 
 class MomentAligner(Aligner):
@@ -9,19 +10,15 @@ class MomentAligner(Aligner):
         self.threshold = threshold
 
     def apply_threshold(self, frame):
-        converted_frame = cv2.cvtColor(frame.astype(np.uint8), cv2.COLOR_BGR2GRAY)
-        _, converted_frame = cv2.threshold(
-            converted_frame, self.threshold, 255, cv2.THRESH_TOZERO
-        )
-        return converted_frame
+        return apply_threshold(frame, self.threshold)
 
     def set_reference(self, reference):
         self.reference = self.apply_threshold(reference)
 
-    def align(self, frame):
+    def estimate(self, frame):
         if self.reference is None:
             self.set_reference(frame)
-            return frame
+            return np.eye(3)
 
         # Convert the current frame to grayscale
         gray_frame = self.apply_threshold(frame)
@@ -43,14 +40,10 @@ class MomentAligner(Aligner):
         # Calculate the scale based on the ratio of reference moment to frame moment
         scale = np.sqrt(reference_moment['m00'] / frame_moment['m00'])
 
-        rows, cols = self.reference.shape
-
         # Scale the current frame with the frame centroid as the pivot
-        M = cv2.getRotationMatrix2D((frame_centroid_x, frame_centroid_y), 0, scale)
-        aligned_frame = cv2.warpAffine(frame, M, (cols, rows))
+        M_scale = to_3x3(cv2.getRotationMatrix2D((frame_centroid_x, frame_centroid_y), 0, scale))
 
-        # Warp the current frame (translation)
-        M = np.float32([[1, 0, translation_x], [0, 1, translation_y]])
-        aligned_frame = cv2.warpAffine(aligned_frame, M, (cols, rows))
+        # Then translate it onto the reference centroid
+        M_trans = translation_matrix(translation_x, translation_y)
 
-        return aligned_frame
+        return M_trans @ M_scale
@@ -1,4 +1,4 @@
-from . import Aligner
+from . import Aligner, to_3x3, translation_matrix
 import cv2
 import numpy as np
 from thresholding import apply_threshold
@@ -17,10 +17,10 @@ class MomentRotateAligner(Aligner):
         self.reference_moment = cv2.moments(self.reference, True)
         self.reference_hu_moment = cv2.HuMoments(self.reference_moment)
 
-    def align(self, frame):
+    def estimate(self, frame):
         if self.reference is None:
             self.set_reference(frame)
-            return frame
+            return np.eye(3)
 
         # Convert the current frame to grayscale
         gray_frame = self.apply_threshold(frame)
@@ -53,16 +53,12 @@ class MomentRotateAligner(Aligner):
             frame_hu_moment[0] + self.reference_hu_moment[0],
         )[0]
 
-        rows, cols = self.reference.shape
-
         # Scale and rotate the current frame with the frame centroid as the pivot
-        M = cv2.getRotationMatrix2D(
-            (frame_centroid_x, frame_centroid_y), np.degrees(angle), scale
+        M_rotate = to_3x3(
+            cv2.getRotationMatrix2D((frame_centroid_x, frame_centroid_y), np.degrees(angle), scale)
         )
-        aligned_frame = cv2.warpAffine(frame, M, (cols, rows))
 
-        # Warp the current frame (translation)
-        M = np.float32([[1, 0, translation_x], [0, 1, translation_y]])
-        aligned_frame = cv2.warpAffine(aligned_frame, M, (cols, rows))
+        # Then translate it onto the reference centroid
+        M_trans = translation_matrix(translation_x, translation_y)
 
-        return aligned_frame
+        return M_trans @ M_rotate
@@ -1,4 +1,5 @@
 from . import Aligner
+import numpy as np
 
 class NullAligner(Aligner):
     def __init__(self):
@@ -7,5 +8,7 @@ class NullAligner(Aligner):
     def set_reference(self, reference):
         self.reference = reference
 
-    def align(self, frame):
-        return frame
\ No newline at end of file
+    def estimate(self, frame):
+        if self.reference is None:
+            self.set_reference(frame)
+        return np.eye(3)
\ No newline at end of file
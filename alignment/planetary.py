@@ -1,26 +1,81 @@
-from . import Aligner
+from . import Aligner, to_3x3, translation_matrix
 import cv2
 import numpy as np
+from thresholding import to_gray, to_uint8
 
 
 class PlanetaryAligner(Aligner):
-    def __init__(self, threshold=0.0):
+    """
+    Aligns a single bright object (such as a planet) by its centroid, area and rotation.
+    The rotation is searched on a small downscaled grayscale patch around the object: a coarse
+    bracket around the moment orientation estimate, refined with a golden-section search. The
+    combined transform is returned, so the colour frame is warped once.
+    """
+
+    def __init__(self, threshold=0.0, patch_size=128):
         super().__init__()
         self.threshold = float(threshold)
+        self.patch_size = patch_size
         self.reference_high = None
         self.reference_low = None
+        self.reference_patch = None
+        self.patch_shape = None
+        self.patch_transform = None
+        self.patch_scale = 1.0
 
-    def apply_threshold(self, frame, factor: float = 1.0):
-        converted_frame = cv2.cvtColor(frame.astype(np.uint8), cv2.COLOR_BGR2GRAY)
+    def _gray(self, frame):
+        return to_uint8(to_gray(frame))
+
+    def _threshold_gray(self, gray, factor: float = 1.0):
         thr = max(0.0, self.threshold * float(factor))
-        _, converted_frame = cv2.threshold(converted_frame, thr, 255, cv2.THRESH_TOZERO)
+        _, converted_frame = cv2.threshold(gray, thr, 255, cv2.THRESH_TOZERO)
         return converted_frame
 
+    def apply_threshold(self, frame, factor: float = 1.0):
+        return self._threshold_gray(self._gray(frame), factor)
+
     def set_reference(self, reference):
-        self.reference_high = self.apply_threshold(reference, 1.3)
-        self.reference_low = self.apply_threshold(reference, 0.7)
+        gray = self._gray(reference)
+        self.reference_high = self._threshold_gray(gray, 1.3)
+        self.reference_low = self._threshold_gray(gray, 0.7)
         self.reference = self.reference_high
 
+        # Square window around the object, downscaled to at most patch_size pixels
+        rows, cols = gray.shape
+        m = cv2.moments(self.reference_low)
+        if m["m00"] != 0:
+            cx, cy = m["m10"] / m["m00"], m["m01"] / m["m00"]
+            x, y, w, h = cv2.boundingRect(self.reference_low)
+            radius = 0.75 * max(
+                abs(x - cx), abs(x + w - cx), abs(y - cy), abs(y + h - cy)
+            ) * 2
+        else:
+            cx, cy, radius = cols / 2, rows / 2, max(rows, cols) / 2
+        radius = max(radius, 8.0)
+        factor = min(1.0, self.patch_size / (2 * radius))
+        self.patch_scale = factor
+        self.patch_shape = (int(np.ceil(2 * radius * factor)),) * 2
+        # Maps full resolution coordinates to patch coordinates
+        self.patch_transform = np.array(
+            [[factor, 0, -factor * (cx - radius)], [0, factor, -factor * (cy - radius)], [0, 0, 1]]
+        )
+        self.reference_patch = self._threshold_gray(
+            self._warp_patch(self._downscale(gray), np.eye(3)), 0.7
+        ).astype(np.float32)
+
+    def _downscale(self, gray):
+        if self.patch_scale >= 1.0:
+            return gray
+        return cv2.resize(
+            gray, None, fx=self.patch_scale, fy=self.patch_scale, interpolation=cv2.INTER_AREA
+        )
+
+    def _warp_patch(self, small_gray, M):
+        # Apply the full resolution transform M to a downscaled frame, producing the patch
+        unscale = np.diag([1.0 / self.patch_scale, 1.0 / self.patch_scale, 1.0])
+        size = (self.patch_shape[1], self.patch_shape[0])
+        return cv2.warpAffine(small_gray, (self.patch_transform @ M @ unscale)[:2], size)
+
     def _centroid_and_scale(self, ref_gray: np.ndarray, frame_gray: np.ndarray):
         ref_m = cv2.moments(ref_gray)
         frm_m = cv2.moments(frame_gray)
@@ -50,72 +105,65 @@ class PlanetaryAligner(Aligner):
         b32 = b_gray.astype(np.float32)
         return float(np.mean(np.abs(a32 - b32)))
 
-    def align(self, frame):
+    def _search_angle(self, evaluate, center: float) -> float:
+        # Coarse bracket, then golden-section refinement around the best coarse angle
+        step = 2.0
+        coarse = [center + off for off in np.arange(-10.0, 10.0001, step)]
+        best = min(coarse, key=evaluate)
+        a, b = best - step, best + step
+        ratio = (np.sqrt(5.0) - 1.0) / 2.0
+        c = b - ratio * (b - a)
+        d = a + ratio * (b - a)
+        fc, fd = evaluate(c), evaluate(d)
+        while b - a > 0.05:
+            if fc < fd:
+                b, d, fd = d, c, fc
+                c = b - ratio * (b - a)
+                fc = evaluate(c)
+            else:
+                a, c, fc = c, d, fd
+                d = a + ratio * (b - a)
+                fd = evaluate(d)
+        return (a + b) / 2.0
+
+    def estimate(self, frame):
         if self.reference_high is None or self.reference_low is None:
             self.set_reference(frame)
-            return frame
+            return np.eye(3)
 
-        rows, cols = self.reference_high.shape
+        gray = self._gray(frame)
 
         # Step 1: Translation/scaling
-        frame_high = self.apply_threshold(frame, 1.3)
+        frame_high = self._threshold_gray(gray, 1.3)
         params = self._centroid_and_scale(self.reference_high, frame_high)
         if params is None:
             return None
         ref_cx, ref_cy, frm_cx, frm_cy, tx, ty, scale = params
 
-        M_scale = cv2.getRotationMatrix2D((frm_cx, frm_cy), 0, scale)
-        new_frame_high = cv2.warpAffine(frame, M_scale, (cols, rows))
-        M_trans = np.float32([[1, 0, tx], [0, 1, ty]])
-        new_frame_high = cv2.warpAffine(new_frame_high, M_trans, (cols, rows))
+        M_scale = to_3x3(cv2.getRotationMatrix2D((frm_cx, frm_cy), 0, scale))
+        M_trans = translation_matrix(tx, ty)
+        M = M_trans @ M_scale
 
         # Step 2: Rotation correction
-        ref_low = self.reference_low
-        new_frame_low = self.apply_threshold(new_frame_high, 0.7)
-
-        reference_angle = self._orientation_angle_deg(ref_low)
-        frame_angle = self._orientation_angle_deg(new_frame_low)
-        base_delta = reference_angle - frame_angle
-
-        best_frame = new_frame_high
-        best_diff = float("inf")
-        best_angle = base_delta
-
-        m_low = cv2.moments(new_frame_low)
-        if m_low.get("m00", 0.0) == 0:
-            return new_frame_high
-        cx = int(m_low["m10"] / m_low["m00"]) if m_low["m00"] != 0 else cols // 2
-        cy = int(m_low["m01"] / m_low["m00"]) if m_low["m00"] != 0 else rows // 2
-
-        def eval_angle(angle_deg: float):
-            M_rot = cv2.getRotationMatrix2D((cx, cy), float(angle_deg), 1.0)
-            candidate = cv2.warpAffine(
-                new_frame_high,
-                M_rot,
-                (cols, rows),
-                flags=cv2.INTER_LINEAR,
-                borderMode=cv2.BORDER_REFLECT,
-            )
-            cand_low = self.apply_threshold(candidate, 0.9)
-            diff = self._difference_metric(ref_low, cand_low)
-            return diff, candidate
-
-        # High level alignment
-        for off in np.arange(-10.0, 10.0001, 0.5):
-            angle = base_delta + float(off)
-            diff, cand = eval_angle(angle)
-            if diff < best_diff:
-                best_diff = diff
-                best_frame = cand
-                best_angle = angle
-
-        # Low level alignment
-        for off in np.arange(-1.0, 1.0001, 0.1):
-            angle = best_angle + float(off)
-            diff, cand = eval_angle(angle)
-            if diff < best_diff:
-                best_diff = diff
-                best_frame = cand
-                best_angle = angle
-
-        return best_frame
+        frame_low = self._threshold_gray(gray, 0.7)
+        m_low = cv2.moments(frame_low)
+        if m_low.get("m00", 0.0) != 0:
+            # Orientation does not change under translation and uniform scaling
+            reference_angle = self._orientation_angle_deg(self.reference_low)
+            frame_angle = self._orientation_angle_deg(frame_low)
+            base_delta = reference_angle - frame_angle
+
+            # Rotate about the low threshold centroid after translation/scaling
+            cx, cy, _ = M @ [m_low["m10"] / m_low["m00"], m_low["m01"] / m_low["m00"], 1.0]
+            cx, cy = int(cx), int(cy)
+            small_gray = self._downscale(gray)
+
+            def evaluate(angle_deg: float) -> float:
+                M_rot = to_3x3(cv2.getRotationMatrix2D((cx, cy), float(angle_deg), 1.0))
+                cand_low = self._threshold_gray(self._warp_patch(small_gray, M_rot @ M), 0.9)
+                return self._difference_metric(self.reference_patch, cand_low)
+
+            angle = self._search_angle(evaluate, base_delta)
+            M = to_3x3(cv2.getRotationMatrix2D((cx, cy), float(angle), 1.0)) @ M
+
+        return M
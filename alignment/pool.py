@@ -0,0 +1,81 @@
+from collections import deque
+import multiprocessing
+import numpy as np
+import os
+import tempfile
+import uuid
+
+# Per-process aligner, created on the first frame a worker receives for each job
+_job_id = None
+_aligner = None
+
+
+def _align(job, frame: np.ndarray):
+    global _job_id, _aligner
+    job_id, aligner_factory, reference_path = job
+    if job_id != _job_id:
+        _aligner = aligner_factory()
+        # Each worker sees an arbitrary subset of the frames, and the workers already use the cores
+        _aligner.set_independent_frames()
+        _aligner.set_threads(1)
+        # The first frame seen by an aligner becomes its reference
+        _aligner.align(np.load(reference_path))
+        _job_id = job_id
+    M = _aligner.estimate(frame)
+    if M is None:
+        return None, None
+    return M, _aligner.apply(frame, M)
+
+
+class AlignmentPool(object):
+    """
+    Aligns frames in a pool of worker processes.
+    Each worker builds its own aligner from aligner_factory (a picklable callable, e.g. a
+    functools.partial of an Aligner class) and loads the reference frame from a temporary file
+    the first time it receives a frame of the run. Aligned frames are returned in input order, so
+    stacking them gives the same result as a serial run of an aligner that carries no state from
+    frame to frame; stateful aligners are told to stop (see Aligner.set_independent_frames).
+    As the workers already run in parallel, each aligner is limited to one thread per frame (see
+    Aligner.set_threads).
+    At most max_pending frames are in flight at any time.
+    An existing multiprocessing pool can be passed as pool to share its workers between runs;
+    otherwise a pool of workers processes is created for each run.
+    """
+
+    def __init__(self, aligner_factory, workers: int, max_pending: int = 0, pool=None):
+        self.aligner_factory = aligner_factory
+        self.workers = workers
+        self.max_pending = max_pending if max_pending > 0 else workers * 2
+        self.pool = pool
+
+    def imap(self, items):
+        """
+        Aligns the frames of an iterable of (key, frame) pairs and yields (key, transform,
+        aligned_frame) tuples in the same order. The first frame is used as the reference and
+        yielded unchanged. Frames that fail to align have None for the transform and frame.
+        """
+        items = iter(items)
+        first = next(items, None)
+        if first is None:
+            return
+        key, reference = first
+        yield key, np.eye(3), reference
+
+        pending = deque()
+        with tempfile.TemporaryDirectory() as directory:
+            reference_path = os.path.join(directory, "reference.npy")
+            np.save(reference_path, reference)
+            job = (uuid.uuid4().hex, self.aligner_factory, reference_path)
+            pool = self.pool if self.pool is not None else multiprocessing.Pool(self.workers)
+            try:
+                for key, frame in items:
+                    if len(pending) >= self.max_pending:
+                        done_key, result = pending.popleft()
+                        yield (done_key,) + result.get()
+                    pending.append((key, pool.apply_async(_align, (job, frame))))
+                while pending:
+                    done_key, result = pending.popleft()
+                    yield (done_key,) + result.get()
+            finally:
+                if self.pool is None:
+                    pool.terminate()
@@ -0,0 +1,102 @@
+from . import Aligner, translation_matrix
+from .fft import FFTAligner
+import cv2
+import numpy as np
+from thresholding import apply_threshold
+
+
+class ProxyAligner(Aligner):
+    """
+    Estimates transforms with the aligner created by aligner_factory on copies of the frames
+    downscaled by factor, and scales them back up so that each frame is warped once at full
+    resolution.
+    When refine is set, the transform is refined by phase correlation on a refine x refine
+    pixel crop at full resolution, centred on the centroid of the thresholded reference, which
+    recovers the translation precision lost to downscaling.
+    """
+
+    def __init__(self, aligner_factory, factor=2.0, refine=0, threshold=0.0):
+        super().__init__()
+        self.aligner = aligner_factory()
+        self.factor = factor
+        self.refine = refine
+        self.threshold = threshold
+        self.crop = None
+        self.refiner = None
+        self.refine_workers = -1
+
+    def set_independent_frames(self):
+        self.aligner.set_independent_frames()
+
+    def set_threads(self, threads: int):
+        self.aligner.set_threads(threads)
+        self.refine_workers = threads
+        if self.refiner is not None:
+            self.refiner.set_threads(threads)
+
+    def _downscale(self, frame):
+        """
+        Returns the downscaled frame and the 3x3 transform from full to downscaled pixel coordinates.
+        """
+        rows, cols = frame.shape[:2]
+        size = (max(1, round(cols / self.factor)), max(1, round(rows / self.factor)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        # Pixel centres: x_small + 0.5 = (x + 0.5) * scale_x
+        scale_x = size[0] / cols
+        scale_y = size[1] / rows
+        S = np.array(
+            [
+                [scale_x, 0, 0.5 * scale_x - 0.5],
+                [0, scale_y, 0.5 * scale_y - 0.5],
+                [0, 0, 1],
+            ]
+        )
+        return small, S
+
+    def set_reference(self, reference):
+        self.reference = reference
+        small, self.reference_scale = self._downscale(reference)
+        self.aligner.estimate(small)
+        if self.refine > 0:
+            self._set_crop(reference)
+
+    def _set_crop(self, reference):
+        rows, cols = reference.shape[:2]
+        width = min(self.refine, cols)
+        height = min(self.refine, rows)
+        moments = cv2.moments(apply_threshold(reference, self.threshold))
+        if moments["m00"] > 0:
+            center_x = moments["m10"] / moments["m00"]
+            center_y = moments["m01"] / moments["m00"]
+        else:
+            center_x, center_y = cols / 2, rows / 2
+        left = int(np.clip(center_x - width / 2, 0, cols - width))
+        top = int(np.clip(center_y - height / 2, 0, rows - height))
+        self.crop = (left, top, width, height)
+        self.refiner = FFTAligner(self.threshold, workers=self.refine_workers)
+        self.refiner.set_reference(reference[top : top + height, left : left + width])
+
+    def _refine(self, frame, M):
+        # Warp only the crop of the aligned frame and measure its remaining shift
+        left, top, width, height = self.crop
+        aligned_crop = cv2.warpPerspective(
+            frame, translation_matrix(-left, -top) @ M, (width, height)
+        )
+        shift_y, shift_x = self.refiner.estimate_shift(
+            self.refiner.apply_threshold(aligned_crop)
+        )
+        return translation_matrix(shift_x, shift_y) @ M
+
+    def estimate(self, frame):
+        if self.reference is None:
+            self.set_reference(frame)
+            return np.eye(3)
+
+        small, S = self._downscale(frame)
+        M = self.aligner.estimate(small)
+        if M is None:
+            return None
+        M = np.linalg.inv(self.reference_scale) @ M @ S
+        if self.refine > 0:
+            M = self._refine(frame, M)
+        return M
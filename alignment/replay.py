@@ -0,0 +1,30 @@
+from . import Aligner
+from .store import frame_fingerprint
+
+
+class ReplayAligner(Aligner):
+    """
+    Replays transforms loaded from a TransformStore instead of estimating them.
+    Frames must be passed in the order of the original run: the n-th call to estimate returns
+    the transform stored for the n-th frame. The reference frame must match the stored fingerprint.
+    """
+
+    def __init__(self, reference: str, transforms: dict):
+        super().__init__()
+        self.reference_fingerprint = reference
+        self.transforms = [transforms[i] for i in sorted(transforms)]
+        self._index = 0
+
+    def set_reference(self, reference):
+        if frame_fingerprint(reference) != self.reference_fingerprint:
+            raise ValueError("Stored alignment was made with a different reference frame.")
+        self.reference = reference
+
+    def estimate(self, frame):
+        if self.reference is None:
+            self.set_reference(frame)
+        if self._index >= len(self.transforms):
+            return None
+        M = self.transforms[self._index]
+        self._index += 1
+        return M
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import numpy as np
+import os
+from reader import input_signature
+
+
+def frame_fingerprint(frame: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(frame).data).hexdigest()
+
+
+class TransformStore(object):
+    """
+    Records the transform estimated for every frame of a run in a sidecar file next to the input,
+    together with a fingerprint of the reference frame.
+    The stored transforms are only returned when the key matches: the input path, size and
+    modification time and the parameters that decide which frames are aligned and how.
+    """
+
+    VERSION = 1
+
+    def __init__(self, input_path: str, **params):
+        self.path = input_path.rstrip("/\\") + ".alignment.npz"
+        self.key = json.dumps(
+            dict(input_signature(input_path), version=self.VERSION, **params), sort_keys=True
+        )
+        self.reference = None
+        self._transforms = {}
+
+    def record(self, i: int, frame: np.ndarray, M: np.ndarray):
+        if self.reference is None:
+            self.reference = frame_fingerprint(frame)
+        self._transforms[i] = M
+
+    def save(self):
+        indices = np.array(sorted(self._transforms), dtype=np.int64)
+        # Frames that failed to align are stored as NaN
+        matrices = np.full((len(indices), 3, 3), np.nan)
+        for row, i in enumerate(indices):
+            if self._transforms[i] is not None:
+                matrices[row] = self._transforms[i]
+        try:
+            with open(self.path, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    key=self.key,
+                    reference=self.reference or "",
+                    indices=indices,
+                    matrices=matrices,
+                )
+        except OSError:
+            print(f"Warning: Could not write alignment to {self.path}.")
+
+    def load(self):
+        """
+        Returns the stored (reference fingerprint, {frame: transform or None}), or None if
+        there are no stored transforms for this key.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path) as data:
+                if str(data["key"]) != self.key:
+                    return None
+                transforms = {
+                    int(i): None if np.isnan(M).any() else M
+                    for i, M in zip(data["indices"], data["matrices"])
+                }
+                return str(data["reference"]), transforms
+        except (OSError, ValueError, KeyError):
+            return None
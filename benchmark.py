@@ -0,0 +1,113 @@
+from benchmark.cases import RUNNERS, run_case
+import argparse
+import json
+import platform
+import subprocess
+import cv2
+import numpy as np
+
+
+def case_key(case):
+    return (case["component"], case["name"], case["width"], case["height"], case["frames"])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    previous = {case_key(case): case for case in baseline["results"]}
+    print(f"Compared with {baseline.get('commit')}:")
+    for case in results:
+        old = previous.get(case_key(case))
+        if old is None or "fps" not in old or "fps" not in case:
+            continue
+        change = (case["fps"] / old["fps"] - 1) * 100
+        line = f"  {case['component']:8} {case['name']:15} {case['width']}x{case['height']} x{case['frames']}: {old['fps']:.1f} -> {case['fps']:.1f} fps ({change:+.1f}%)"
+        if case.get("error_px") is not None and old.get("error_px") is not None:
+            line += f", error {old['error_px']:.3f} -> {case['error_px']:.3f} px"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the aligners, scorers, stackers and readers on synthetic frames."
+    )
+    parser.add_argument("output", help="JSON file to write the results to")
+    parser.add_argument(
+        "--components",
+        help="components to benchmark",
+        nargs="+",
+        choices=list(RUNNERS),
+        default=list(RUNNERS),
+    )
+    parser.add_argument(
+        "--only",
+        help="only benchmark these names (e.g. fft median)",
+        nargs="+",
+        default=None,
+    )
+    parser.add_argument(
+        "--resolutions",
+        help="frame sizes as WIDTHxHEIGHT",
+        nargs="+",
+        default=["640x480", "1920x1080"],
+    )
+    parser.add_argument(
+        "--frames", help="frame counts", nargs="+", type=int, default=[30]
+    )
+    parser.add_argument(
+        "--seed", help="seed of the synthetic scenes", type=int, default=0
+    )
+    parser.add_argument(
+        "--compare",
+        help="previous results file to compare frames/sec and alignment error against",
+        default=None,
+    )
+    args = parser.parse_args()
+
+    results = []
+    for component in args.components:
+        names = [name for name in RUNNERS[component][0] if args.only is None or name in args.only]
+        for resolution in args.resolutions:
+            width, height = (int(v) for v in resolution.lower().split("x"))
+            for frames in args.frames:
+                for name in names:
+                    case = run_case(component, name, width, height, frames, args.seed)
+                    results.append(case)
+                    if "error" in case:
+                        print(f"{component:8} {name:15} {resolution} x{frames}: {case['error']}")
+                        continue
+                    line = f"{component:8} {name:15} {resolution} x{frames}: {case['fps']:.1f} fps"
+                    if case["rss_increase_mb"] is not None:
+                        line += f", {case['peak_rss_mb']:.0f} MB peak (+{case['rss_increase_mb']:.0f} MB)"
+                    if case.get("error_px") is not None:
+                        line += f", error {case['error_px']:.3f} px"
+                    if case.get("failed"):
+                        line += f", {case['failed']} failed"
+                    print(line)
+
+    report = {
+        "commit": git_commit(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
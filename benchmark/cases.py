@@ -0,0 +1,281 @@
+from alignment.bottom_left import BottomLeftAligner
+from alignment.ecc import EccAligner
+from alignment.fft import FFTAligner
+from alignment.moment import MomentAligner
+from alignment.moment_rotate import MomentRotateAligner
+from alignment.orb import OrbAligner
+from alignment.planetary import PlanetaryAligner
+from alignment.sift import SiftAligner
+from reader.folder import FolderReader
+from reader.prefetch import PrefetchReader
+from reader.sorted import SortedReader
+from reader.video import VideoReader
+from scoring.brightness import BrightnessScorer
+from scoring.contrast import ContrastScorer
+from scoring.engine import ScoringEngine
+from scoring.sharpness import SharpnessScorer
+from scoring.smallest_area import SmallestAreaScorer
+from stacking.average import AverageStacker
+from stacking.maximum import MaximumStacker
+from stacking.median import MedianStacker
+from stacking.minimum import MinimumStacker
+from stacking.sigma_clip import SigmaClipStacker
+from stacking.tiled import TiledStacker
+from . import synthetic
+from functools import partial
+import multiprocessing
+import numpy as np
+import os
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is then not reported
+    resource = None
+
+# Each aligner is benchmarked on the scene it is meant for: (scene, rotation in degrees, factory).
+# Translation-only aligners get no rotation, so their error measures the translation estimate.
+ALIGNERS = {
+    "sift": ("stars", 0.5, partial(SiftAligner, 20)),
+    "orb": ("stars", 0.5, partial(OrbAligner, 20)),
+    "fft": ("stars", 0.0, partial(FFTAligner, 20)),
+    "ecc": ("stars", 0.5, partial(EccAligner, 20)),
+    "bottom-left": ("planet", 0.0, partial(BottomLeftAligner, 20)),
+    "moment": ("planet", 0.0, partial(MomentAligner, 20)),
+    "moment_rotate": ("planet", 1.0, partial(MomentRotateAligner, 20)),
+    "planetary": ("planet", 1.0, partial(PlanetaryAligner, 20)),
+}
+
+SCORERS = {
+    "brightness": BrightnessScorer,
+    "contrast": ContrastScorer,
+    "sharpness": SharpnessScorer,
+    "smallest_area": partial(SmallestAreaScorer, 20),
+}
+
+STACKERS = {
+    "avg": AverageStacker,
+    "avg-float32": partial(AverageStacker, "float32"),
+    "avg-float64": partial(AverageStacker, "float64"),
+    "max": MaximumStacker,
+    "min": MinimumStacker,
+    "median": MedianStacker,
+    "median-spill": partial(MedianStacker, 64 << 20),
+    "sigma": SigmaClipStacker,
+    "tiled-avg": partial(TiledStacker, AverageStacker, 512),
+}
+
+READERS = {
+    "folder": lambda path: FolderReader(path),
+    "video": lambda path: VideoReader(path),
+    "prefetch-folder": lambda path: PrefetchReader(FolderReader(path), threads=4),
+    "prefetch-video": lambda path: PrefetchReader(VideoReader(path)),
+    "sorted-folder": lambda path: SortedReader(
+        FolderReader(path), None, 0.5, engine=ScoringEngine([SharpnessScorer()])
+    ),
+    # Kept frames are read in file order through the prefetcher, with skip_frames in between
+    "sorted-file-order": lambda path: SortedReader(
+        PrefetchReader(FolderReader(path), threads=4),
+        None,
+        0.5,
+        file_order=True,
+        engine=ScoringEngine([SharpnessScorer()]),
+    ),
+}
+
+
+def write_frames(path, frames):
+    with open(path, "wb") as f:
+        for frame in frames:
+            frame.tofile(f)
+
+
+def read_frames(path, shape, dtype):
+    """
+    Yields the frames stored by write_frames one at a time, each in a newly allocated array, so
+    that a case only holds the frames its component keeps.
+    """
+    size = int(np.prod(shape))
+    with open(path, "rb") as f:
+        while True:
+            frame = np.fromfile(f, dtype=dtype, count=size)
+            if frame.size < size:
+                return
+            yield frame.reshape(shape)
+
+
+def prepare_inputs(component, name, width, height, frames, seed, directory):
+    """
+    Generates the synthetic input of a case and writes it to directory: raw frames (and ground
+    truth transforms for aligners) or, for readers, a video or image folder.
+    Returns the keyword arguments of the case's runner.
+    """
+    scene, rotation = "stars", 0.0
+    if component == "aligner":
+        scene, rotation = ALIGNERS[name][:2]
+    images, transforms = synthetic.generate(scene, width, height, frames, rotation=rotation, seed=seed)
+
+    if component == "reader":
+        if "video" in name:
+            path = os.path.join(directory, "input.avi")
+            synthetic.write_video(path, images)
+        else:
+            path = os.path.join(directory, "input")
+            synthetic.write_folder(path, images)
+        return {"path": path, "frames": frames}
+
+    path = os.path.join(directory, "frames.raw")
+    write_frames(path, images)
+    inputs = {"path": path, "shape": images[0].shape, "dtype": images[0].dtype.str}
+    if component == "aligner":
+        inputs["transforms_path"] = os.path.join(directory, "transforms.npy")
+        np.save(inputs["transforms_path"], np.array(transforms))
+    return inputs
+
+
+def run_aligner(name, path, shape, dtype, transforms_path):
+    scene, _, factory = ALIGNERS[name]
+    transforms = np.load(transforms_path)
+    height, width = shape[:2]
+    images = read_frames(path, shape, dtype)
+    aligner = factory()
+    aligner.align(next(images))
+
+    errors = []
+    failed = 0
+    start = time.perf_counter()
+    for image, transform in zip(images, transforms[1:]):
+        M = aligner.estimate(image)
+        if M is None:
+            failed += 1
+            continue
+        aligner.apply(image, M)
+        errors.append(synthetic.alignment_error(M, transforms[0], transform, width, height))
+    elapsed = time.perf_counter() - start
+    return {
+        "scene": scene,
+        "seconds": elapsed,
+        "fps": (len(transforms) - 1) / elapsed,
+        "failed": failed,
+        "error_px": float(np.mean(errors)) if errors else None,
+        "median_error_px": float(np.median(errors)) if errors else None,
+        "max_error_px": float(np.max(errors)) if errors else None,
+    }
+
+
+def run_scorer(name, path, shape, dtype):
+    engine = ScoringEngine([SCORERS[name]()])
+    count = 0
+    start = time.perf_counter()
+    for image in read_frames(path, shape, dtype):
+        engine.measure(image)
+        count += 1
+    elapsed = time.perf_counter() - start
+    engine.close()
+    return {"scene": "stars", "seconds": elapsed, "fps": count / elapsed}
+
+
+def run_stacker(name, path, shape, dtype):
+    stacker = STACKERS[name]()
+    count = 0
+    start = time.perf_counter()
+    for image in read_frames(path, shape, dtype):
+        stacker.stack(image)
+        count += 1
+    stacker.get_image()
+    elapsed = time.perf_counter() - start
+    return {"scene": "stars", "seconds": elapsed, "fps": count / elapsed}
+
+
+def run_reader(name, path, frames):
+    start = time.perf_counter()
+    reader = READERS[name](path)
+    count = 0
+    while reader.next_frame() is not None:
+        count += 1
+    elapsed = time.perf_counter() - start
+    reader.close()
+    return {"scene": "stars", "seconds": elapsed, "fps": frames / elapsed, "read": count}
+
+
+RUNNERS = {
+    "aligner": (ALIGNERS, run_aligner),
+    "scorer": (SCORERS, run_scorer),
+    "stacker": (STACKERS, run_stacker),
+    "reader": (READERS, run_reader),
+}
+
+
+def _status_mb(field):
+    # VmRSS and VmHWM from /proc are per process image, unlike ru_maxrss, which on Linux carries
+    # the parent's peak over into a spawned child
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    peak = _status_mb("VmHWM")
+    if peak is not None or resource is None:
+        return peak
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def _run_case(queue, component, name, inputs):
+    try:
+        # Start the peak from the current RSS (interpreter and imports) where the OS allows it
+        baseline = _status_mb("VmRSS") if _reset_peak_rss() else _peak_rss_mb()
+        result = RUNNERS[component][1](name, **inputs)
+        result["peak_rss_mb"] = _peak_rss_mb()
+        result["rss_increase_mb"] = (
+            None if baseline is None or result["peak_rss_mb"] is None
+            else result["peak_rss_mb"] - baseline
+        )
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_case(component, name, width, height, frames, seed=0):
+    """
+    Writes the case's input to disk, then runs the case in a fresh process that streams the input
+    back, so that its peak RSS covers only the component and not the generator or earlier cases.
+    Returns a dict of the case's parameters and measurements.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = prepare_inputs(component, name, width, height, frames, seed, directory)
+        process = context.Process(
+            target=_run_case, args=(queue, component, name, inputs)
+        )
+        process.start()
+        result = queue.get()
+        process.join()
+    case = {
+        "component": component,
+        "name": name,
+        "width": width,
+        "height": height,
+        "frames": frames,
+    }
+    case.update(result)
+    return case
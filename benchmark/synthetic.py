@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+import os
+
+
+def _star_field(width, height, rng):
+    scene = np.zeros((height, width), dtype=np.float32)
+    count = max(50, width * height // 1500)
+    xs = rng.uniform(0, width, count)
+    ys = rng.uniform(0, height, count)
+    brightness = rng.uniform(0.1, 1.0, count) ** 2
+    for x, y, b in zip(xs, ys, brightness):
+        # Brighter stars have larger discs, which gives feature detectors distinct neighbourhoods
+        cv2.circle(scene, (int(x), int(y)), 1 + int(3 * b), float(b), -1, cv2.LINE_AA)
+    scene = cv2.GaussianBlur(scene, (0, 0), 1.2)
+    scene /= max(float(scene.max()), 1e-6)
+    # Faint nebulosity
+    nebula = cv2.resize(rng.random((8, 8), dtype=np.float32), (width, height), interpolation=cv2.INTER_CUBIC)
+    scene += 0.1 * np.clip(nebula, 0.0, 1.0)
+    return cv2.cvtColor(np.clip(scene, 0.0, 1.0), cv2.COLOR_GRAY2BGR)
+
+
+def _planet(width, height, rng):
+    scene = np.zeros((height, width, 3), dtype=np.float32)
+    center = (width // 2, height // 2)
+    radius = min(width, height) // 5
+    cv2.circle(scene, center, radius, (0.45, 0.6, 0.8), -1, cv2.LINE_AA)
+    # Bands and a spot so that rotation is observable
+    for offset in rng.uniform(-0.7, 0.7, 4):
+        y = int(center[1] + offset * radius)
+        cv2.ellipse(scene, (center[0], y), (int(radius * 0.95), max(2, radius // 12)), 0, 0, 360, (0.3, 0.4, 0.55), -1, cv2.LINE_AA)
+    cv2.circle(scene, (center[0] + radius // 3, center[1] + radius // 4), max(3, radius // 8), (0.2, 0.3, 0.6), -1, cv2.LINE_AA)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    cv2.circle(mask, center, radius, 255, -1, cv2.LINE_AA)
+    scene *= (mask / 255.0)[:, :, None]
+    return cv2.GaussianBlur(scene, (0, 0), 1.0)
+
+
+def generate(kind: str, width: int, height: int, frames: int, jitter: float = 3.0, rotation: float = 0.0, noise: float = 0.02, seed: int = 0, dtype=np.uint8):
+    """
+    Renders a synthetic scene ("stars" or "planet") and returns (frames, transforms).
+    Frame i is the scene moved by the 3x3 transforms[i]: a random translation with standard
+    deviation jitter pixels and a random rotation about the centre with standard deviation
+    rotation degrees, plus Gaussian noise with standard deviation noise (as a fraction of full scale).
+    """
+    rng = np.random.default_rng(seed)
+    scene = _star_field(width, height, rng) if kind == "stars" else _planet(width, height, rng)
+    maximum = 1.0 if np.dtype(dtype).kind == "f" else np.iinfo(dtype).max
+
+    images = []
+    transforms = []
+    for _ in range(frames):
+        dx, dy = rng.normal(0.0, jitter, 2)
+        angle = rng.normal(0.0, rotation) if rotation > 0 else 0.0
+        M = np.eye(3)
+        M[:2] = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        M[0, 2] += dx
+        M[1, 2] += dy
+        image = cv2.warpAffine(scene, M[:2], (width, height))
+        image += rng.normal(0.0, noise, image.shape).astype(np.float32)
+        image = np.clip(image, 0.0, 1.0) * maximum
+        if np.dtype(dtype).kind != "f":
+            image = np.rint(image)
+        images.append(image.astype(dtype))
+        transforms.append(M)
+    return images, transforms
+
+
+def write_video(path: str, frames, fps: int = 30):
+    height, width = frames[0].shape[:2]
+    video = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for frame in frames:
+        video.write(frame)
+    video.release()
+
+
+def write_folder(path: str, frames, extension: str = ".png"):
+    os.makedirs(path, exist_ok=True)
+    for i, frame in enumerate(frames):
+        cv2.imwrite(os.path.join(path, f"{i:05d}{extension}"), frame)
+
+
+def alignment_error(estimated: np.ndarray, reference: np.ndarray, transform: np.ndarray, width: int, height: int) -> float:
+    """
+    RMS distance in pixels between where the estimated and the true alignment send a grid of
+    points. reference and transform are the ground truth transforms of the reference frame and
+    of the aligned frame, so the true alignment is reference @ inv(transform).
+    """
+    truth = reference @ np.linalg.inv(transform)
+    xs, ys = np.meshgrid(np.linspace(0, width - 1, 5), np.linspace(0, height - 1, 5))
+    points = np.stack([xs.ravel(), ys.ravel(), np.ones(xs.size)])
+    a = estimated @ points
+    b = truth @ points
+    a = a[:2] / a[2]
+    b = b[:2] / b[2]
+    return float(np.sqrt(np.mean(np.sum((a - b) ** 2, axis=0))))
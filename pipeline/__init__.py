@@ -0,0 +1,549 @@
+from alignment.bottom_left import BottomLeftAligner
+from alignment.fft import FFTAligner
+from alignment.moment_rotate import MomentRotateAligner
+from alignment.null import NullAligner
+from alignment.orb import OrbAligner
+from alignment.sift import SiftAligner
+from alignment.ecc import EccAligner
+from alignment.moment import MomentAligner
+from alignment.planetary import PlanetaryAligner
+from alignment.proxy import ProxyAligner
+from scoring.contrast import ContrastScorer
+from scoring.sharpness import SharpnessScorer
+from scoring.smallest_area import SmallestAreaScorer
+from stacking.maximum import MaximumStacker
+from stacking.average import AverageStacker
+from stacking.median import MedianStacker
+from stacking.minimum import MinimumStacker
+from stacking.composite import CompositeStacker
+from stacking.sigma_clip import SigmaClipStacker
+from stacking.tiled import TiledStacker
+from reader.video import VideoReader
+from reader.folder import FolderReader
+from reader.sorted import SortedReader
+from reader.manual import ManualReader
+from reader.prefetch import PrefetchReader
+from reader.step import StepReader
+from reader.frame_range import RangeReader, to_frame_index
+from scoring.brightness import BrightnessScorer
+from scoring.cache import ScoreCache
+from scoring.engine import ScoringEngine
+from writer import FrameWriter
+from thresholding import full_scale, to_depth, to_gray, to_uint8
+from alignment.pool import AlignmentPool
+from alignment.replay import ReplayAligner
+from alignment.store import TransformStore
+from profiling import Profiler
+from profiling.frame import FrameProfiler
+from .options import default_options
+import argparse
+from functools import partial
+from tqdm import tqdm
+import cv2
+import multiprocessing
+import os
+import numpy as np
+
+
+def batch_names(inputs) -> list:
+    """
+    Returns a distinct output name for each input in a batch: the input's file or folder name
+    without its extension. Inputs that share a name are told apart by their extension (clip_avi,
+    clip_mp4), then by their parent folder (a_clip), then by a counter.
+    """
+    paths = [os.path.abspath(input_path.rstrip("/\\")) for input_path in inputs]
+    stems = [os.path.splitext(os.path.basename(path)) for path in paths]
+    names = [root for root, _ in stems]
+
+    def duplicates():
+        return {name for name in names if names.count(name) > 1}
+
+    # Extensions are only added where they tell inputs apart
+    extensions = {}
+    for root, ext in stems:
+        extensions.setdefault(root, set()).add(ext)
+    for i, (root, ext) in enumerate(stems):
+        if len(extensions[root]) > 1 and ext:
+            names[i] = f"{root}_{ext[1:]}"
+
+    repeated = duplicates()
+    for i, path in enumerate(paths):
+        parent = os.path.basename(os.path.dirname(path))
+        if names[i] in repeated and parent:
+            names[i] = f"{parent}_{names[i]}"
+
+    # The same input given twice, or inputs in folders of the same name, can still collide
+    repeated = duplicates()
+    seen = {}
+    for i, name in enumerate(names):
+        if name in repeated:
+            seen[name] = seen.get(name, 0) + 1
+            names[i] = f"{name}_{seen[name]}"
+    return names
+
+
+def batch_output_path(output: str, name: str) -> str:
+    """
+    Returns the output path of the input named name (see batch_names) in a batch: output with
+    {name} replaced by the name, or a PNG of that name in the output folder.
+    """
+    if "{name}" in output:
+        return output.replace("{name}", name)
+    return os.path.join(output, name + ".png")
+
+
+def fit_to_format(image: np.ndarray, path: str) -> np.ndarray:
+    """
+    Rescales image to the deepest depth the encoder for path can write: float only for TIFF,
+    16-bit for PNG and TIFF, and 8-bit for every other format (e.g. JPEG).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if image.dtype.kind == "f" and ext not in (".tif", ".tiff"):
+        image = to_depth(image, np.uint16)
+    if image.dtype == np.uint16 and ext not in (".png", ".tif", ".tiff"):
+        image = to_depth(image, np.uint8)
+    return image
+
+
+def suffixed_path(path: str, suffix: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}_{suffix}{ext}"
+
+
+class Pipeline(object):
+    """
+    Stacks videos or image folders with a set of options, as parsed from the command line (see
+    default_options): reading, scoring and selection, alignment, stacking and saving.
+    A pipeline can run any number of inputs. With more than one alignment worker, the worker
+    processes are started once and shared by every run; call close when done.
+    """
+
+    def __init__(self, options: argparse.Namespace = None):
+        self.options = options if options is not None else default_options()
+        self._pool = None
+
+    def _worker_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.options.workers)
+        return self._pool
+
+    def create_reader(self, input_path: str, args: argparse.Namespace, profiler: Profiler):
+        # Read video
+        if os.path.isdir(input_path):
+            reader = FolderReader(input_path)
+            decode_threads = args.decode_threads
+        else:
+            reader = VideoReader(input_path)
+            # Video frames can only be decoded in order
+            decode_threads = 1
+
+        try:
+            # Seek to the start of the range and crop before anything else touches the frames
+            if args.start is not None or args.end is not None or args.roi is not None:
+                args.start = (
+                    to_frame_index(args.start, reader.frame_rate()) if args.start is not None else 0
+                )
+                args.end = (
+                    to_frame_index(args.end, reader.frame_rate()) if args.end is not None else None
+                )
+                reader = RangeReader(reader, args.start, args.end, args.roi)
+
+            # Skipped frames are passed over below the prefetcher, so they are never decoded
+            if args.step > 1:
+                reader = StepReader(reader, args.step)
+
+            if args.prefetch > 0:
+                reader = PrefetchReader(reader, args.prefetch, decode_threads)
+
+            # Optional manual selection; if enabled, skip automatic scoring/sorting
+            if args.manual:
+                reader = ManualReader(reader, args.scale)
+
+            profiler.lap("setup")
+            if (not args.manual) and (args.score != "none" or args.top < 100.0):
+                if args.score == "brightness":
+                    scorer = BrightnessScorer()
+                elif args.score == "contrast":
+                    scorer = ContrastScorer()
+                elif args.score == "sharpness":
+                    scorer = SharpnessScorer()
+                elif args.score == "smallest":
+                    scorer = SmallestAreaScorer(args.threshold)
+                else:
+                    scorer = ContrastScorer()
+
+                engine = ScoringEngine(
+                    [scorer],
+                    args.threshold,
+                    args.border / 100.0,
+                    args.score_scale,
+                    args.score_crop / 100.0,
+                    args.score_threads,
+                )
+                try:
+                    reader = SortedReader(
+                        reader,
+                        scorer,
+                        args.top / 100.0,
+                        args.border / 100.0,
+                        args.threshold,
+                        args.single_pass,
+                        args.memory * 1024 * 1024,
+                        args.file_order,
+                        engine,
+                        None
+                        if args.no_score_cache
+                        else ScoreCache(
+                            input_path,
+                            scorer=args.score,
+                            threshold=args.threshold,
+                            border=args.border,
+                            scale=args.score_scale,
+                            crop=args.score_crop,
+                            step=args.step,
+                            start=args.start,
+                            end=args.end,
+                            roi=args.roi,
+                        ),
+                        profiler,
+                    )
+                finally:
+                    # The engine is only used while the frames are scored
+                    engine.close()
+                for frame_index, score in reader.scores.items():
+                    profiler.record(
+                        frame_index,
+                        index=(args.start or 0) + frame_index * args.step + 1,
+                        score=score,
+                    )
+                profiler.lap("score")
+        except BaseException:
+            # Closes every reader created so far
+            reader.close()
+            raise
+        return reader
+
+    def create_aligner_factory(self, args: argparse.Namespace):
+        if args.align == "sift":
+            aligner_factory = partial(
+                SiftAligner,
+                args.threshold,
+                args.feature_scale,
+                args.max_keypoints,
+                args.matcher or "bf",
+            )
+        elif args.align == "ecc":
+            aligner_factory = partial(
+                EccAligner,
+                args.threshold,
+                args.ecc_motion,
+                args.ecc_levels,
+                args.ecc_iterations,
+                warm_start=not args.no_ecc_warm_start,
+            )
+        elif args.align == "moment":
+            aligner_factory = partial(MomentAligner, args.threshold)
+        elif args.align == "orb":
+            aligner_factory = partial(
+                OrbAligner,
+                args.threshold,
+                args.feature_scale,
+                args.max_keypoints,
+                args.matcher or "flann",
+            )
+        elif args.align == "moment_rotate":
+            aligner_factory = partial(MomentRotateAligner, args.threshold)
+        elif args.align == "fourier" or args.align == "fft":
+            aligner_factory = partial(FFTAligner, args.threshold)
+        elif args.align == "bottom-left":
+            aligner_factory = partial(BottomLeftAligner, args.threshold)
+        elif args.align == "planetary":
+            aligner_factory = partial(PlanetaryAligner, args.threshold)
+        else:
+            aligner_factory = NullAligner
+
+        if args.proxy > 1.0 and args.align != "none":
+            aligner_factory = partial(
+                ProxyAligner,
+                aligner_factory,
+                args.proxy,
+                args.proxy_refine,
+                args.threshold,
+            )
+        return aligner_factory
+
+    def create_transform_store(self, input_path: str, args: argparse.Namespace):
+        # Transforms are stored for any run with the same frames, alignment and rotation; without
+        # an aligner there is nothing to store
+        if args.manual or args.align == "none":
+            return None
+        return TransformStore(
+            input_path,
+            **{
+                name: getattr(args, name)
+                for name in [
+                    "align",
+                    "threshold",
+                    "rotation",
+                    "step",
+                    "start",
+                    "end",
+                    "roi",
+                    "score",
+                    "top",
+                    "border",
+                    "file_order",
+                    "score_scale",
+                    "score_crop",
+                    "ecc_motion",
+                    "ecc_levels",
+                    "ecc_iterations",
+                    "no_ecc_warm_start",
+                    "feature_scale",
+                    "max_keypoints",
+                    "matcher",
+                    "proxy",
+                    "proxy_refine",
+                ]
+            },
+        )
+
+    def create_stackers(self, args: argparse.Namespace) -> dict:
+        stackers = {}
+        for method in args.stack:
+            if method == "max":
+                stacker_factory = MaximumStacker
+            elif method == "min":
+                stacker_factory = MinimumStacker
+            elif method == "median":
+                stacker_factory = partial(MedianStacker, args.memory * 1024 * 1024)
+            elif method == "sigma":
+                stacker_factory = partial(
+                    SigmaClipStacker, args.kappa, args.sigma_iterations
+                )
+            else:
+                stacker_factory = partial(AverageStacker, args.accumulator)
+
+            if args.tile > 0:
+                stackers[method] = TiledStacker(
+                    stacker_factory, args.tile, args.tile_threads
+                )
+            else:
+                stackers[method] = stacker_factory()
+        return stackers
+
+    def run(self, input_path: str, output_path: str, profile_path: str = None) -> list:
+        """
+        Stacks input_path and writes the result to output_path, or with several stacking methods
+        to output_path suffixed with each method. Returns the paths of the written images.
+        """
+        # Options resolved for this input, such as time ranges, must not leak into later runs
+        args = argparse.Namespace(**vars(self.options))
+        profile_path = profile_path if profile_path is not None else args.profile
+        profiler = FrameProfiler() if profile_path else Profiler()
+
+        reader = self.create_reader(input_path, args, profiler)
+        writer = None
+        stacker = None
+        try:
+            aligner_factory = self.create_aligner_factory(args)
+            transform_store = self.create_transform_store(input_path, args)
+
+            stored = None
+            if args.reuse_alignment and transform_store is not None:
+                stored = transform_store.load()
+                if stored is None:
+                    print("Warning: No matching stored alignment, aligning frames.")
+
+            stackers = self.create_stackers(args)
+            stacker = CompositeStacker(stackers)
+
+            aligned_folder = input_path + "_aligned"
+            if not args.no_save_aligned and not os.path.exists(aligned_folder):
+                os.makedirs(aligned_folder)
+
+            original_folder = input_path + "_selected"
+            if not args.no_save_selected and not os.path.exists(original_folder):
+                os.makedirs(original_folder)
+
+            writer = FrameWriter(args.writers)
+
+            def source_index(i):
+                # Index among the frames kept by --start and --step of the frame read at loop
+                # index i
+                position = (i - 1 - (args.start or 0)) // args.step
+                if isinstance(reader, SortedReader):
+                    return reader.frames[position]
+                return position
+
+            profiler.lap("setup")
+
+            count = 0
+            # Stack frames
+            with tqdm(total=reader.total_frames()) as pbar:
+
+                def read_frames():
+                    position = 0
+                    while True:
+                        frame = reader.next_frame()
+                        if frame is None:
+                            profiler.lap("read")
+                            return
+                        # Frames are numbered as in the input, counting the skipped ones and
+                        # the frames before the start of the range
+                        i = (args.start or 0) + position * args.step + 1
+                        position += 1
+                        source = source_index(i)
+                        profiler.lap("read", source)
+                        # Rotate the frame
+                        if args.rotation == 90:
+                            frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+                        elif args.rotation == 180:
+                            frame = cv2.rotate(frame, cv2.ROTATE_180)
+                        elif args.rotation == 270:
+                            frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+                        profiler.lap("rotate", source)
+
+                        if not args.no_save_selected:
+                            frame_path = os.path.join(original_folder, f"{i:05d}.jpg")
+                            writer.write(frame_path, to_uint8(frame))
+                            profiler.lap("save_selected", source)
+                        yield i, frame
+
+                def align_frames(aligner):
+                    for i, frame in read_frames():
+                        M = aligner.estimate(frame)
+                        yield i, M, None if M is None else aligner.apply(frame, M)
+
+                if stored is not None:
+                    aligned_frames = align_frames(ReplayAligner(*stored))
+                elif args.workers > 1:
+                    aligned_frames = AlignmentPool(
+                        aligner_factory, args.workers, pool=self._worker_pool()
+                    ).imap(read_frames())
+                else:
+                    aligned_frames = align_frames(aligner_factory())
+
+                for i, M, frame in aligned_frames:
+                    # With worker processes this is the time spent waiting for the aligned frame
+                    source = source_index(i)
+                    profiler.lap("align", source)
+                    profiler.record(
+                        source,
+                        index=(args.start or 0) + source * args.step + 1,
+                        success=M is not None,
+                        transform=None if M is None else M.tolist(),
+                    )
+                    if transform_store is not None and stored is None:
+                        transform_store.record(i, frame, M)
+                    if frame is None:
+                        pbar.update(1)
+                        continue
+
+                    # Apply mask
+                    if args.mask:
+                        # The threshold is on the 8-bit scale
+                        scale = full_scale(frame.dtype)
+                        mask = cv2.inRange(
+                            to_gray(frame), args.threshold * scale / 255.0, scale
+                        )
+                        frame = cv2.bitwise_and(frame, frame, mask=mask)
+                        profiler.lap("mask", source)
+
+                    # Save frame back to a subfolder
+                    if not args.no_save_aligned:
+                        frame_path = os.path.join(aligned_folder, f"{i:05d}.jpg")
+                        writer.write(frame_path, to_uint8(frame))
+                        profiler.lap("save_aligned", source)
+
+                    if args.scale > 0:
+                        if frame.dtype == np.uint8:
+                            frame = cv2.convertScaleAbs(frame, alpha=args.scale, beta=0)
+                        else:
+                            # Keep the depth, saturating like convertScaleAbs
+                            frame = cv2.addWeighted(frame, args.scale, frame, 0, 0)
+                        profiler.lap("scale", source)
+                    stacker.stack(frame)
+                    profiler.lap("stack", source)
+                    profiler.count()
+                    count += 1
+                    pbar.update(1)
+        except BaseException:
+            if stacker is not None:
+                stacker.close()
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+            # Close reader, which closes every reader it wraps
+            reader.close()
+        try:
+            profiler.lap("save_wait")
+            if transform_store is not None and stored is None:
+                transform_store.save()
+            profiler.lap("setup")
+            if count == 0:
+                raise ValueError(f"No frames of {input_path} could be stacked.")
+
+            # Save stacked images
+            images = stacker.get_images()
+        finally:
+            stacker.close()
+        profiler.lap("stack")
+        written = []
+        for method, stacked in images.items():
+            method_output_path = output_path
+            if len(stackers) > 1:
+                method_output_path = suffixed_path(output_path, method)
+
+            if args.output_depth == "8":
+                stacked = to_depth(stacked, np.uint8)
+            elif args.output_depth == "16":
+                stacked = to_depth(stacked, np.uint16)
+            elif args.output_depth == "float":
+                stacked = to_depth(stacked, np.float32)
+
+            fitted = fit_to_format(stacked, method_output_path)
+            if fitted.dtype != stacked.dtype and args.output_depth != "auto":
+                print(f"Warning: {method_output_path} cannot store {stacked.dtype} images, writing {fitted.dtype} instead.")
+            stacked = fitted
+
+            if cv2.imwrite(method_output_path, stacked):
+                written.append(method_output_path)
+            else:
+                print(f"Warning: Could not write {method_output_path}.")
+        profiler.lap("output")
+
+        if profile_path:
+            profiler.summary()
+            profiler.save(profile_path)
+        return written
+
+    def run_batch(self, inputs, output: str) -> dict:
+        """
+        Runs every input in turn, writing each to batch_output_path(output, name), with the names
+        from batch_names so that no input overwrites another. An input that fails is reported and
+        skipped. Returns the error of each failed input.
+        """
+        if "{name}" not in output:
+            os.makedirs(output, exist_ok=True)
+        inputs = list(inputs)
+        failures = {}
+        for input_path, name in zip(inputs, batch_names(inputs)):
+            output_path = batch_output_path(output, name)
+            profile_path = None
+            if self.options.profile:
+                profile_path = batch_output_path(suffixed_path(self.options.profile, "{name}"), name)
+            print(f"{input_path} -> {output_path}")
+            try:
+                self.run(input_path, output_path, profile_path)
+            except Exception as e:
+                print(f"Warning: Could not stack {input_path}: {e}")
+                failures[input_path] = e
+        return failures
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
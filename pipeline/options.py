@@ -0,0 +1,317 @@
+import argparse
+
+
+def parse_roi(value):
+    try:
+        roi = [int(v) for v in value.split(",")]
+    except ValueError:
+        roi = []
+    if len(roi) != 4 or min(roi[:2]) < 0 or min(roi[2:]) <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a region x,y,w,h")
+    return roi
+
+
+# Command line options, also used as the options of a Pipeline
+parser = argparse.ArgumentParser(description="Stack images from a video.")
+parser.add_argument(
+    "input",
+    help="path to video file or image folder; several inputs are stacked one after the other as a batch",
+    nargs="+",
+)
+parser.add_argument(
+    "output",
+    help="path to output file; for a batch, an output folder or a path containing {name}, the name of each input",
+)
+parser.add_argument(
+    "--align",
+    help="alignment method",
+    choices=[
+        "sift",
+        "ecc",
+        "moment",
+        "moment_rotate",
+        "orb",
+        "fourier",
+        "fft",
+        "bottom-left",
+        "planetary",
+        "none",
+    ],
+    default="none",
+)
+parser.add_argument(
+    "--stack",
+    help="stacking methods; with several, one output is written per method as <output>_<method>",
+    choices=["max", "avg", "min", "median", "sigma"],
+    nargs="+",
+    default=["avg"],
+)
+parser.add_argument(
+    "--accumulator",
+    help="accumulator type for average stacking (auto: uint32 for 8-bit frames, float32 otherwise)",
+    choices=["auto", "uint32", "float32", "float64"],
+    default="auto",
+)
+parser.add_argument(
+    "--kappa",
+    help="number of standard deviations kept by sigma clipping",
+    type=float,
+    default=2.5,
+)
+parser.add_argument(
+    "--sigma-iterations",
+    help="number of sigma clipping passes",
+    type=int,
+    default=1,
+)
+parser.add_argument(
+    "--tile",
+    help="stack in tiles of this many pixels per side, in parallel (0 stacks whole frames)",
+    type=int,
+    default=0,
+)
+parser.add_argument(
+    "--tile-threads",
+    help="number of threads stacking tiles",
+    type=int,
+    default=4,
+)
+parser.add_argument(
+    "--top", help="percent of top frames to stack", type=float, default=100.0
+)
+parser.add_argument(
+    "--threshold", help="brightness threshold for alignment", type=float, default=0.0
+)
+parser.add_argument(
+    "--score",
+    help="scoring method",
+    choices=["contrast", "brightness", "sharpness", "smallest", "none"],
+    default="none",
+)
+parser.add_argument(
+    "--rotation", help="rotation angle of the image", type=int, default=0
+)
+parser.add_argument("--step", help="step to skip frames", type=int, default=1)
+parser.add_argument(
+    "--start",
+    help="first frame to read, as a frame index or a time (e.g. 90s or 1:30)",
+    default=None,
+)
+parser.add_argument(
+    "--end",
+    help="frame to stop reading at (exclusive), as a frame index or a time (e.g. 90s or 1:30)",
+    default=None,
+)
+parser.add_argument(
+    "--roi",
+    help="region of interest x,y,w,h in pixels; frames are cropped to it before any other stage",
+    type=parse_roi,
+    default=None,
+)
+parser.add_argument(
+    "--mask",
+    help="whether to use the threshold as a mask",
+    action="store_true",
+)
+parser.add_argument(
+    "--border",
+    help="ignore border percent (percent of the border area to ignore)",
+    type=float,
+    default=0.0,
+)
+parser.add_argument(
+    "--scale", help="scale to apply to brightness", type=float, default=0.0
+)
+parser.add_argument(
+    "--output-depth",
+    help="bit depth of the output image (auto keeps the depth of the input where the format allows: 16-bit needs .png or .tif, float needs .tif)",
+    choices=["auto", "8", "16", "float"],
+    default="auto",
+)
+parser.add_argument(
+    "--manual",
+    help="manually choose frames with an interactive viewer",
+    action="store_true",
+)
+parser.add_argument(
+    "--score-scale",
+    help="scale at which frames are scored",
+    type=float,
+    default=1.0,
+)
+parser.add_argument(
+    "--score-crop",
+    help="percent of the border to crop before scoring",
+    type=float,
+    default=0.0,
+)
+parser.add_argument(
+    "--score-threads",
+    help="number of threads scoring frames",
+    type=int,
+    default=4,
+)
+parser.add_argument(
+    "--no-score-cache",
+    help="do not read or write the score cache next to the input",
+    action="store_true",
+)
+parser.add_argument(
+    "--single-pass",
+    help="keep the top frames while scoring instead of decoding them again for stacking",
+    action="store_true",
+)
+parser.add_argument(
+    "--file-order",
+    help="stack the selected frames in file order to avoid seeking back and forth",
+    action="store_true",
+)
+parser.add_argument(
+    "--no-save-selected",
+    help="do not save the selected frames to <input>_selected",
+    action="store_true",
+)
+parser.add_argument(
+    "--no-save-aligned",
+    help="do not save the aligned frames to <input>_aligned",
+    action="store_true",
+)
+parser.add_argument(
+    "--writers",
+    help="number of background threads saving frames",
+    type=int,
+    default=2,
+)
+parser.add_argument(
+    "--ecc-motion",
+    help="motion model for ECC alignment",
+    choices=["translation", "euclidean", "affine", "homography"],
+    default="affine",
+)
+parser.add_argument(
+    "--ecc-levels", help="pyramid levels for ECC alignment", type=int, default=3
+)
+parser.add_argument(
+    "--ecc-iterations",
+    help="maximum ECC iterations per pyramid level",
+    type=int,
+    default=50,
+)
+parser.add_argument(
+    "--no-ecc-warm-start",
+    help="start ECC from the identity for every frame instead of the previous frame's warp (always the case with --workers)",
+    action="store_true",
+)
+parser.add_argument(
+    "--feature-scale",
+    help="scale at which SIFT/ORB features are detected",
+    type=float,
+    default=1.0,
+)
+parser.add_argument(
+    "--proxy",
+    help="estimate alignment on frames downscaled by this factor (1 disables proxy alignment)",
+    type=float,
+    default=1.0,
+)
+parser.add_argument(
+    "--proxy-refine",
+    help="size in pixels of the full resolution crop used to refine proxy alignment (0 disables refinement)",
+    type=int,
+    default=0,
+)
+parser.add_argument(
+    "--max-keypoints",
+    help="maximum number of SIFT/ORB keypoints per frame",
+    type=int,
+    default=5000,
+)
+parser.add_argument(
+    "--matcher",
+    help="feature matcher for SIFT/ORB alignment (defaults to bf for SIFT, flann for ORB)",
+    choices=["bf", "flann"],
+)
+parser.add_argument(
+    "--reuse-alignment",
+    help="replay the transforms saved by a previous run with the same input and alignment options",
+    action="store_true",
+)
+parser.add_argument(
+    "--workers",
+    help="number of processes used to align frames (1 aligns in the main process)",
+    type=int,
+    default=1,
+)
+parser.add_argument(
+    "--memory",
+    help="memory budget in MB for buffered frames (median stacking, single pass selection)",
+    type=int,
+    default=1024,
+)
+parser.add_argument(
+    "--prefetch",
+    help="number of frames to decode ahead on background threads (0 disables prefetching)",
+    type=int,
+    default=8,
+)
+parser.add_argument(
+    "--decode-threads",
+    help="number of threads decoding image folder frames in parallel",
+    type=int,
+    default=4,
+)
+parser.add_argument(
+    "--profile",
+    help="time each stage, print a summary and write a per-frame report to this path (.csv for CSV, otherwise JSON lines)",
+    default=None,
+)
+
+
+def _check_option(action: argparse.Action, value):
+    # Converts and checks a value as argparse would for the same option on the command line
+    name = action.option_strings[0] if action.option_strings else action.dest
+    if isinstance(action, (argparse._StoreTrueAction, argparse._StoreFalseAction)):
+        if not isinstance(value, bool):
+            raise ValueError(f"{name} takes True or False, not {value!r}")
+        return value
+    if action.nargs in ("+", "*"):
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"{name} takes a list of values, not {value!r}")
+        values = list(value)
+        if action.nargs == "+" and not values:
+            raise ValueError(f"{name} takes at least one value")
+    else:
+        values = [value]
+
+    checked = []
+    for item in values:
+        if isinstance(item, (list, tuple)):
+            # Such as a region given as [x, y, w, h] instead of "x,y,w,h"
+            item = ",".join(str(v) for v in item)
+        try:
+            item = action.type(str(item)) if action.type is not None else str(item)
+        except (TypeError, ValueError, argparse.ArgumentTypeError) as e:
+            raise ValueError(f"{name}: invalid value {item!r} ({e})") from None
+        if action.choices is not None and item not in action.choices:
+            choices = ", ".join(repr(choice) for choice in action.choices)
+            raise ValueError(f"{name}: invalid choice {item!r} (choose from {choices})")
+        checked.append(item)
+    return checked if action.nargs in ("+", "*") else checked[0]
+
+
+def default_options(**overrides):
+    """
+    Returns the command line options with their default values, updated with overrides.
+    Overrides are converted and checked like the command line values of the same options, so
+    e.g. stack takes a list of methods and roi either "x,y,w,h" or [x, y, w, h]; None restores
+    an option to unset. Raises TypeError for an unknown option and ValueError for a bad value.
+    """
+    options = parser.parse_args(["input", "output"])
+    actions = {action.dest: action for action in parser._actions}
+    for name, value in overrides.items():
+        if not hasattr(options, name):
+            raise TypeError(f"Unknown option {name}")
+        if value is not None:
+            value = _check_option(actions[name], value)
+        setattr(options, name, value)
+    return options
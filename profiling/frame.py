@@ -0,0 +1,86 @@
+from . import Profiler
+import csv
+import json
+import time
+
+
+class FrameProfiler(Profiler):
+    """
+    Splits the wall time of a run into stages and keeps per-frame values and stage timings.
+    Each lap attributes the time since the previous lap to a stage, so the stage totals add up
+    to the run time. Frames are identified by their index in the input.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        super().__init__()
+        self.stages = {}
+        self.frames = {}
+        self.stacked = 0
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def _frame(self, frame):
+        row = self.frames.get(frame)
+        if row is None:
+            row = self.frames[frame] = {"frame": frame, "stages": {}}
+        return row
+
+    def lap(self, stage: str, frame: int = None):
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed
+        if frame is not None:
+            self.add(stage, frame, elapsed)
+
+    def add(self, stage: str, frame: int, seconds: float):
+        stages = self._frame(frame)["stages"]
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def record(self, frame: int, **values):
+        self._frame(frame).update(values)
+
+    def count(self, frames: int = 1):
+        self.stacked += frames
+
+    def summary(self):
+        total = self._last - self._start
+        print(f"Profile ({total:.2f} s):")
+        for stage, seconds in sorted(self.stages.items(), key=lambda item: -item[1]):
+            percentage = 100.0 * seconds / total if total > 0 else 0.0
+            print(f"  {stage:14} {seconds:9.3f} s {percentage:6.1f}%")
+        if total > 0:
+            print(f"  {self.stacked} frames stacked, {self.stacked / total:.2f} frames/sec")
+
+    def save(self, path: str):
+        """
+        Writes one row per frame, as CSV if path ends with .csv and as JSON lines otherwise.
+        """
+        rows = [self.frames[frame] for frame in sorted(self.frames)]
+        try:
+            with open(path, "w", newline="") as f:
+                if path.lower().endswith(".csv"):
+                    self._write_csv(f, rows)
+                else:
+                    for row in rows:
+                        f.write(json.dumps(row) + "\n")
+        except OSError:
+            print(f"Warning: Could not write profile to {path}.")
+
+    def _write_csv(self, f, rows):
+        stages = list(self.stages)
+        fields = []
+        for row in rows:
+            fields.extend(key for key in row if key != "stages" and key not in fields)
+        writer = csv.writer(f)
+        writer.writerow(fields + [f"{stage}_s" for stage in stages])
+        for row in rows:
+            values = []
+            for field in fields:
+                value = row.get(field)
+                # Transforms are written as a JSON list in a single column
+                values.append(json.dumps(value) if isinstance(value, list) else value)
+            values.extend(row["stages"].get(stage) for stage in stages)
+            writer.writerow(values)
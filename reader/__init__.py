@@ -1,4 +1,22 @@
 import numpy as np
+import os
+
+
+def input_signature(path: str) -> dict:
+    """
+    Describes the input file or folder well enough to tell when it has changed.
+    """
+    if os.path.isdir(path):
+        # Folder contents can change without changing the folder itself
+        stats = [e.stat() for e in os.scandir(path) if e.is_file()]
+        size = sum(s.st_size for s in stats)
+        mtime = max((s.st_mtime for s in stats), default=0.0)
+        count = len(stats)
+    else:
+        stat = os.stat(path)
+        size, mtime, count = stat.st_size, stat.st_mtime, 1
+    return {"path": os.path.abspath(path), "size": size, "mtime": mtime, "files": count}
+
 
 class Reader(object):
     def __init__(self):
@@ -12,9 +30,17 @@ class Reader(object):
 
     def skip_next_frame(self):
         pass
+
+    def skip_frames(self, count: int):
+        for _ in range(count):
+            self.skip_next_frame()
     
     def total_frames(self) -> int:
         return 0
+
+    def frame_rate(self) -> float:
+        # Frames per second, or 0 if the input has no timing
+        return 0.0
     
     def reset(self):
         pass
@@ -15,26 +15,33 @@ class FolderReader(Reader):
         # self._files.sort(key=lambda x: int(x.split('.')[0]))
 
         # Filter out non-image files
-        self._files = [f for f in self._files if f.endswith('.jpg') or f.endswith('.png') or f.endswith('.tif')]
+        self._files = [f for f in self._files if f.endswith('.jpg') or f.endswith('.png') or f.endswith('.tif') or f.endswith('.tiff')]
         self._count = len(self._files)
     
+    def _read(self, name) -> np.ndarray:
+        # Keep the native bit depth (e.g. 16-bit TIFF) but always return 3 channels
+        return cv2.imread(os.path.join(self._path, name), cv2.IMREAD_ANYDEPTH | cv2.IMREAD_COLOR)
+
     def next_frame(self) -> np.ndarray:
         if self._index >= self._count:
             return None
-        frame = cv2.imread(os.path.join(self._path, self._files[self._index]))
+        frame = self._read(self._files[self._index])
         self._index += 1
         return frame
     
     def get_frame(self, i) -> np.ndarray:
         if i < 0 or i >= self._count:
             return None
-        return cv2.imread(os.path.join(self._path, self._files[i]))
+        return self._read(self._files[i])
 
     def reset(self):
         self._index = 0
 
     def skip_next_frame(self):
         self._index += 1
+
+    def skip_frames(self, count: int):
+        self._index += max(0, count)
     
     def total_frames(self) -> int:
         return self._count
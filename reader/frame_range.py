@@ -0,0 +1,100 @@
+from . import Reader
+import numpy as np
+
+
+def to_frame_index(value, frame_rate: float) -> int:
+    """
+    Converts a position given as a frame index (150 or "150") or as a time ("12.5s", "2:30",
+    "1:02:03.5") to a frame index. Times need the frame rate of the input.
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    value = str(value).strip()
+    if ":" not in value and not value.endswith("s"):
+        return int(value)
+    if frame_rate <= 0:
+        raise ValueError(f"{value} is a time, but the input has no frame rate.")
+    if value.endswith("s"):
+        seconds = float(value[:-1])
+    else:
+        seconds = 0.0
+        for part in value.split(":"):
+            seconds = seconds * 60 + float(part)
+    return int(round(seconds * frame_rate))
+
+
+class RangeReader(Reader):
+    """
+    Restricts the wrapped reader to the frames from start up to, but not including, end, and
+    crops them to roi, an (x, y, width, height) rectangle, which must lie inside the frames
+    (ValueError otherwise).
+    The wrapped reader skips straight to start with skip_frames, which seeks in videos. Cropped
+    frames are copied out of the decoded frames, so buffering them (e.g. in SortedReader) only
+    holds the region of interest rather than keeping every full frame alive.
+    """
+
+    def __init__(self, reader: Reader, start: int = 0, end: int = None, roi=None):
+        super().__init__()
+        self.reader = reader
+        self.start = max(0, start)
+        self.end = end
+        self.roi = roi
+        self._index = 0
+        self._started = False
+
+    def _crop(self, frame: np.ndarray) -> np.ndarray:
+        if frame is None or self.roi is None:
+            return frame
+        x, y, width, height = self.roi
+        if x + width > frame.shape[1] or y + height > frame.shape[0]:
+            raise ValueError(
+                f"Region {x},{y},{width},{height} does not fit in the "
+                f"{frame.shape[1]}x{frame.shape[0]} frames."
+            )
+        return frame[y : y + height, x : x + width].copy()
+
+    def _seek_start(self):
+        if not self._started:
+            self.reader.skip_frames(self.start)
+            self._started = True
+
+    def next_frame(self) -> np.ndarray:
+        if self.end is not None and self.start + self._index >= self.end:
+            return None
+        self._seek_start()
+        self._index += 1
+        return self._crop(self.reader.next_frame())
+
+    def get_frame(self, i) -> np.ndarray:
+        if i < 0 or (self.end is not None and self.start + i >= self.end):
+            return None
+        return self._crop(self.reader.get_frame(self.start + i))
+
+    def skip_next_frame(self):
+        self.skip_frames(1)
+
+    def skip_frames(self, count: int):
+        if self.end is not None:
+            count = min(count, self.end - self.start - self._index)
+        if count <= 0:
+            return
+        self._seek_start()
+        self.reader.skip_frames(count)
+        self._index += count
+
+    def total_frames(self) -> int:
+        total = self.reader.total_frames()
+        if self.end is not None:
+            total = min(total, self.end)
+        return max(0, total - self.start)
+
+    def frame_rate(self) -> float:
+        return self.reader.frame_rate()
+
+    def reset(self):
+        self.reader.reset()
+        self._index = 0
+        self._started = False
+
+    def close(self):
+        self.reader.close()
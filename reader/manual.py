@@ -1,6 +1,7 @@
 from . import Reader
 import numpy as np
 import cv2
+from thresholding import to_uint8
 
 class ManualReader(Reader):
     """
@@ -34,6 +35,7 @@ class ManualReader(Reader):
             if frame is None:
                 break
 
+            frame = to_uint8(frame)
             if self.scale > 0:
                 frame = cv2.convertScaleAbs(frame, alpha=self.scale, beta=0)
 
@@ -144,3 +146,4 @@ class ManualReader(Reader):
 
     def close(self):
         self.frames = []
+        self.reader.close()
@@ -0,0 +1,148 @@
+from . import Reader
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import queue
+import threading
+
+class PrefetchReader(Reader):
+    """
+    Wraps another Reader and decodes frames ahead of the caller on background threads.
+    Up to depth frames are buffered in a bounded queue.
+    With threads == 1 the wrapped reader is read sequentially with next_frame, which works for
+    any reader. With threads > 1 frames are decoded in parallel with get_frame and returned in
+    order, which requires a reader with thread-safe random access such as FolderReader.
+    """
+
+    def __init__(self, reader: Reader, depth: int = 8, threads: int = 1):
+        super().__init__()
+        self.reader = reader
+        self.depth = max(1, depth)
+        self.threads = max(1, threads)
+        self._index = 0  # frames returned or skipped so far
+        self._queue = None
+        self._stop = None
+        self._producer = None
+        self._executor = None
+        self._done = False
+        # Whether the wrapped reader's sequential position matches self._index
+        self._in_sync = True
+        # Frames read from the wrapped reader by the sequential producer, or None if unknown
+        self._produced = 0
+
+    def _start(self):
+        if self.threads == 1 and not self._in_sync:
+            self.reader.reset()
+            self.reader.skip_frames(self._index)
+        self._in_sync = False
+        self._produced = self._index
+        self._queue = queue.Queue(self.depth)
+        self._stop = threading.Event()
+        if self.threads > 1:
+            self._executor = ThreadPoolExecutor(self.threads)
+            target = self._produce_parallel
+        else:
+            target = self._produce_sequential
+        self._producer = threading.Thread(target=target, daemon=True)
+        self._producer.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce_sequential(self):
+        try:
+            while True:
+                frame = self.reader.next_frame()
+                if frame is not None:
+                    self._produced += 1
+                if not self._put(frame) or frame is None:
+                    return
+        except Exception as e:
+            self._put(e)
+
+    def _produce_parallel(self):
+        for i in range(self._index, self.reader.total_frames()):
+            if not self._put(self._executor.submit(self.reader.get_frame, i)):
+                return
+        self._put(None)
+
+    def _stop_prefetch(self):
+        if self._producer is None:
+            return
+        self._stop.set()
+        # Drain the queue so a blocked producer can observe the stop event
+        while self._producer.is_alive():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                self._producer.join(0.01)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._producer = None
+        self._queue = None
+
+    def next_frame(self) -> np.ndarray:
+        if self._done:
+            return None
+        if self._producer is None:
+            self._start()
+        item = self._queue.get()
+        if isinstance(item, Future):
+            item = item.result()
+        if isinstance(item, Exception):
+            self._done = True
+            raise item
+        if item is None:
+            self._done = True
+            return None
+        self._index += 1
+        return item
+
+    def get_frame(self, i) -> np.ndarray:
+        self._stop_prefetch()
+        # Random access may move the wrapped reader
+        self._in_sync = False
+        self._produced = None
+        return self.reader.get_frame(i)
+
+    def skip_next_frame(self):
+        self.skip_frames(1)
+
+    def skip_frames(self, count: int):
+        # Frames that are already decoded ahead are used up first
+        while count > 0 and self._queue is not None and not self._queue.empty():
+            if self.next_frame() is None:
+                return
+            count -= 1
+        if count <= 0 or self._done:
+            return
+
+        # Skip the rest in the wrapped reader, which can grab or seek, and prefetch from there
+        self._stop_prefetch()
+        target = self._index + count
+        if self.threads == 1:
+            position = self._index if self._in_sync else self._produced
+            if position is not None and position <= target:
+                self.reader.skip_frames(target - position)
+                self._in_sync = True
+        self._index = target
+
+    def total_frames(self) -> int:
+        return self.reader.total_frames()
+
+    def reset(self):
+        self._stop_prefetch()
+        self.reader.reset()
+        self._index = 0
+        self._done = False
+        self._in_sync = True
+
+    def close(self):
+        self._stop_prefetch()
+        self.reader.close()
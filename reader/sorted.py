@@ -1,54 +1,187 @@
 from scoring import Scorer
+from scoring.cache import ScoreCache
+from scoring.engine import ScoringEngine
+from profiling import Profiler
 from . import Reader
+import heapq
 import numpy as np
+import tempfile
 from tqdm import tqdm
-from thresholding import has_valid_pixels
 
 class SortedReader(Reader):
+    """
+    Scores every frame of the wrapped reader and exposes the top keepPercentage of valid frames
+    in descending score order.
+    When single_pass is set, the best frames are kept in a bounded min-heap while scoring, so
+    they never need to be decoded a second time. The kept frames are held in memory, or in a
+    memory mapped temporary file once they would exceed memory_limit bytes.
+    When file_order is set, the kept frames are returned in ascending frame index instead, and
+    are read from the wrapped reader sequentially rather than with a seek per frame. The score
+    ranking stays available in ranking.
+    Frames are scored in batches by engine, which defaults to a single threaded ScoringEngine
+    for scorer, threshold and border.
+    When a cache is given and holds scores for the same input and parameters, the scoring pass
+    is skipped entirely; otherwise the new scores are saved to it.
+    The time spent decoding and scoring each frame is reported to profiler.
+    """
 
-    def __init__(self, reader: Reader, scorer: Scorer, keepPercentage: float = 1.0, border: float = 0.0, threshold: float = 0.0):
+    def __init__(self, reader: Reader, scorer: Scorer, keepPercentage: float = 1.0, border: float = 0.0, threshold: float = 0.0, single_pass: bool = False, memory_limit: int = 1 << 30, file_order: bool = False, engine: ScoringEngine = None, cache: ScoreCache = None, profiler: Profiler = None):
         super().__init__()
         self.frames = []
-        scores = []
         self.index = 0
         self.reader = reader
+        self.single_pass = single_pass
+        self.memory_limit = memory_limit
+        self.file_order = file_order
+        self.ranking = []
+        self.scores = {}
+        self._buffer = None
+        self._slots = []
+        self._position = 0
+        self.profiler = profiler if profiler is not None else Profiler()
+
+        total = reader.total_frames()
+        # Upper bound on the number of kept frames, assuming every frame is valid
+        capacity = total - int(total * (1 - keepPercentage))
+        heap = []
+
+        cached = cache.load() if cache is not None else None
+        if cached is not None:
+            # Nothing is buffered, so kept frames are read from the wrapped reader
+            self.single_pass = single_pass = False
+            self.frames, scores = cached
+        else:
+            if engine is None:
+                # An engine created here is also closed here; a given engine is closed by its owner
+                default_engine = ScoringEngine([scorer], threshold, border)
+                try:
+                    scores = self._score(default_engine, total, capacity, heap)
+                finally:
+                    default_engine.close()
+            else:
+                scores = self._score(engine, total, capacity, heap)
+            reader.reset()
+            if cache is not None:
+                cache.save(self.frames, scores)
+        self.scores = dict(zip(self.frames, scores))
+
+        if single_pass:
+            # Trim to the exact count now that the number of valid frames is known
+            keep = len(self.frames) - int(len(self.frames) * (1 - keepPercentage))
+            while len(heap) > keep:
+                heapq.heappop(heap)
+            heap.sort(reverse=True)
+            self.ranking = [i for _, i, _ in heap]
+            if file_order:
+                heap.sort(key=lambda entry: entry[1])
+            self.frames = [i for _, i, _ in heap]
+            self._slots = [slot for _, _, slot in heap]
+            return
 
-        with tqdm(total=reader.total_frames(), desc="Scoring frames") as pbar:
-            for i in range(reader.total_frames()):
-                frame = reader.next_frame()
-                if frame is None:
-                    break
-                if not has_valid_pixels(frame, threshold, border):
-                    pbar.update(1)
-                    continue
-                self.frames.append(i)
-                scores.append(scorer.score(frame))
-                pbar.update(1)
-        reader.reset()
         # Sort the frames by score
         sortedIndices = sorted(range(len(scores)), key=lambda k: scores[k])
         self.frames = [self.frames[i] for i in sortedIndices]
         # Remove the bottom keepPercentage of frames
         self.frames = list(reversed(self.frames[int(len(self.frames) * (1 - keepPercentage)):]))
+        self.ranking = list(self.frames)
+        if file_order:
+            self.frames.sort()
+
+    def _score(self, engine, total, capacity, heap):
+        scores = []
+        batch_size = engine.threads * 4
+        with tqdm(total=total, desc="Scoring frames") as pbar:
+            i = 0
+            while i < total:
+                batch = []
+                while i + len(batch) < total and len(batch) < batch_size:
+                    frame = self.reader.next_frame()
+                    if frame is None:
+                        total = i + len(batch)
+                        break
+                    self.profiler.lap("score_read", i + len(batch))
+                    batch.append(frame)
+
+                measurements = engine.measure_batch(batch, self.profiler.enabled)
+                self.profiler.lap("score")
+                for frame, measured in zip(batch, measurements):
+                    if self.profiler.enabled:
+                        measured, seconds = measured
+                        self.profiler.add("score", i, seconds)
+                    if measured is not None:
+                        self.frames.append(i)
+                        scores.append(measured[0])
+                        if self.single_pass and capacity > 0:
+                            self._keep(heap, capacity, scores[-1], i, frame)
+                    i += 1
+                    pbar.update(1)
+        return scores
+
+    def _keep(self, heap, capacity, score, i, frame):
+        if self._buffer is None:
+            if capacity * frame.nbytes > self.memory_limit:
+                self._buffer = np.memmap(
+                    tempfile.TemporaryFile(),
+                    dtype=frame.dtype,
+                    mode="w+",
+                    shape=(capacity,) + frame.shape,
+                )
+            else:
+                self._buffer = [None] * capacity
+
+        if len(heap) < capacity:
+            slot = len(heap)
+            heapq.heappush(heap, (score, i, slot))
+        elif (score, i) > heap[0][:2]:
+            _, _, slot = heapq.heapreplace(heap, (score, i, heap[0][2]))
+        else:
+            return
+        self._buffer[slot] = frame
+
+    def _read(self, i) -> np.ndarray:
+        if self.single_pass:
+            return np.array(self._buffer[self._slots[i]])
+        return self.reader.get_frame(self.frames[i])
+
+    def _read_sequential(self, i) -> np.ndarray:
+        target = self.frames[i]
+        if self._position is None or target < self._position:
+            self.reader.reset()
+            self._position = 0
+        self.reader.skip_frames(target - self._position)
+        self._position = target + 1
+        return self.reader.next_frame()
 
-    
     def next_frame(self) -> np.ndarray:
         if self.index >= len(self.frames):
             return None
-        frame = self.reader.get_frame(self.frames[self.index])
+        if self.file_order and not self.single_pass:
+            frame = self._read_sequential(self.index)
+        else:
+            frame = self._read(self.index)
         self.index += 1
         return frame
-    
+
     def get_frame(self, i) -> np.ndarray:
         if i < 0 or i >= len(self.frames):
             return None
-        return self.reader.get_frame(self.frames[i])
-    
+        if not self.single_pass:
+            # Random access moves the wrapped reader, so sequential reads must restart
+            self._position = None
+        return self._read(i)
+
+    def skip_next_frame(self):
+        self.index += 1
+
     def reset(self):
         self.index = 0
-    
+
     def total_frames(self) -> int:
         return len(self.frames)
-    
+
     def close(self):
-        self.frames = []
\ No newline at end of file
+        self.frames = []
+        self.ranking = []
+        self._slots = []
+        self._buffer = None
+        self.reader.close()
@@ -0,0 +1,44 @@
+from . import Reader
+import numpy as np
+
+class StepReader(Reader):
+    """
+    Returns every step-th frame of the wrapped reader, starting with the first.
+    The frames in between are passed over with skip_frames, so they are never decoded by readers
+    that can skip cheaply, and wrappers such as PrefetchReader only ever see the kept frames.
+    """
+
+    def __init__(self, reader: Reader, step: int):
+        super().__init__()
+        self.reader = reader
+        self.step = max(1, step)
+        self._started = False
+
+    def next_frame(self) -> np.ndarray:
+        if self._started:
+            self.reader.skip_frames(self.step - 1)
+        self._started = True
+        return self.reader.next_frame()
+
+    def get_frame(self, i) -> np.ndarray:
+        self._started = True
+        return self.reader.get_frame(i * self.step)
+
+    def skip_next_frame(self):
+        self.skip_frames(1)
+
+    def skip_frames(self, count: int):
+        if count <= 0:
+            return
+        self.reader.skip_frames(count * self.step - (0 if self._started else self.step - 1))
+        self._started = True
+
+    def total_frames(self) -> int:
+        return (self.reader.total_frames() + self.step - 1) // self.step
+
+    def reset(self):
+        self.reader.reset()
+        self._started = False
+
+    def close(self):
+        self.reader.close()
@@ -1,39 +1,106 @@
 from . import Reader
 import numpy as np
 import cv2
+import time
 
 class VideoReader(Reader):
-    def __init__(self, path: str):
+    """
+    Reads frames from a video file in order.
+    Skipped frames are grabbed without being converted to BGR. Longer skips of at least
+    min_seek frames seek instead whenever the measured cost of a seek is below that of
+    grabbing the same number of frames, which depends on the codec's keyframe interval.
+    """
+
+    def __init__(self, path: str, min_seek: int = 8):
         super().__init__()
         self._path = path
         self._capture = None
-    
-    def next_frame(self) -> np.ndarray:
+        self._position = 0
+        self.min_seek = min_seek
+        # Running estimates of the seconds per grabbed frame and per seek
+        self._grab_time = None
+        self._seek_time = None
+
+    def _open(self):
         if self._capture is None:
             self._capture = cv2.VideoCapture(self._path)
+            self._position = 0
+    
+    def next_frame(self) -> np.ndarray:
+        self._open()
         ret, frame = self._capture.read()
         if not ret:
             return None
+        self._position += 1
         return frame
     
     def get_frame(self, i) -> np.ndarray:
-        if self._capture is None:
-            self._capture = cv2.VideoCapture(self._path)
+        self._open()
         self._capture.set(cv2.CAP_PROP_POS_FRAMES, i)
+        self._position = i
         ret, frame = self._capture.read()
         if not ret:
             return None
+        self._position += 1
         return frame
 
+    def skip_next_frame(self):
+        self._open()
+        # grab() advances the stream without converting the frame
+        if self._capture.grab():
+            self._position += 1
+
+    def _average(self, previous, sample):
+        return sample if previous is None else 0.8 * previous + 0.2 * sample
+
+    def _grab(self, count: int) -> bool:
+        start = time.perf_counter()
+        for _ in range(count):
+            if not self._capture.grab():
+                return False
+            self._position += 1
+        self._grab_time = self._average(self._grab_time, (time.perf_counter() - start) / count)
+        return True
+
+    def skip_frames(self, count: int):
+        if count <= 0:
+            return
+        self._open()
+        if self._grab_time is None and count > self.min_seek:
+            # Measure grabbing on the first frames before deciding how to skip the rest
+            if not self._grab(self.min_seek):
+                return
+            count -= self.min_seek
+
+        # Seeking is tried once to be measured, then used whenever it is cheaper
+        seek = (
+            count >= self.min_seek
+            and self._grab_time is not None
+            and (self._seek_time is None or self._seek_time < count * self._grab_time)
+        )
+        if seek:
+            start = time.perf_counter()
+            target = self._position + count
+            if self._capture.set(cv2.CAP_PROP_POS_FRAMES, target):
+                self._position = target
+                self._seek_time = self._average(self._seek_time, time.perf_counter() - start)
+                return
+            # The backend cannot seek in this stream, so always grab
+            self._seek_time = float("inf")
+        self._grab(count)
+
+    def frame_rate(self) -> float:
+        self._open()
+        return self._capture.get(cv2.CAP_PROP_FPS)
+
     def reset(self):
         self.close()
 
     def total_frames(self) -> int:
-        if self._capture is None:
-            self._capture = cv2.VideoCapture(self._path)
+        self._open()
         return int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT))
     
     def close(self):
         if self._capture is not None:
             self._capture.release()
-            self._capture = None
\ No newline at end of file
+            self._capture = None
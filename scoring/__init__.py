@@ -7,3 +7,6 @@ class Scorer(object):
 
     def score(self, frame: np.ndarray):
         return 0
+
+    def score_gray(self, gray: np.ndarray):
+        return 0
@@ -1,9 +1,13 @@
+from . import Scorer
 import numpy as np
 
 
-class BrightnessScorer:
+class BrightnessScorer(Scorer):
     def __init__(self):
         super().__init__()
 
     def score(self, frame):
         return np.mean(frame)
+
+    def score_gray(self, gray):
+        return np.mean(gray)
@@ -0,0 +1,44 @@
+import json
+import os
+from reader import input_signature
+
+
+class ScoreCache(object):
+    """
+    Stores the valid frame indices and their scores in a sidecar file next to the input.
+    The cache is only used when its key matches: the input path, size and modification time and
+    the scoring parameters. Any mismatch invalidates it and the next save overwrites it.
+    """
+
+    VERSION = 1
+
+    def __init__(self, input_path: str, **params):
+        self.path = input_path.rstrip("/\\") + ".scores.json"
+        self.key = dict(input_signature(input_path), version=self.VERSION, **params)
+
+    def load(self):
+        """
+        Returns the cached (frames, scores), or None if there is no valid cache.
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("key") != self.key:
+            return None
+        return data["frames"], data["scores"]
+
+    def save(self, frames, scores):
+        data = {
+            "key": self.key,
+            "frames": list(frames),
+            "scores": [float(score) for score in scores],
+        }
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            print(f"Warning: Could not write score cache to {self.path}.")
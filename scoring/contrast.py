@@ -1,6 +1,8 @@
+from . import Scorer
 import numpy as np
+import cv2
 
-class ContrastScorer:
+class ContrastScorer(Scorer):
     def __init__(self):
         super().__init__()
 
@@ -8,4 +10,9 @@ class ContrastScorer:
         # Calculate contrast of the image
         mean = np.mean(frame)
         std = np.std(frame)
-        return std / mean
\ No newline at end of file
+        return std / mean
+
+    def score_gray(self, gray):
+        # Mean and standard deviation in a single pass
+        mean, std = cv2.meanStdDev(gray)
+        return std[0, 0] / mean[0, 0]
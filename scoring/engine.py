@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+import time
+from thresholding import full_scale, to_gray
+
+
+class ScoringEngine(object):
+    """
+    Scores frames with one or more scorers from a single grayscale conversion.
+    The grayscale frame, at the frame's native depth, is used for the validity check (any pixel above threshold, ignoring the
+    border) and, optionally downscaled by scale and cropped by crop, for every scorer.
+    Batches of frames are measured in parallel on a thread pool.
+    """
+
+    def __init__(self, scorers, threshold=0.0, border=0.0, scale=1.0, crop=0.0, threads=1):
+        self.scorers = scorers
+        self.threshold = threshold
+        self.border = border
+        self.scale = scale
+        self.crop = crop
+        self.threads = max(1, threads)
+        self._executor = ThreadPoolExecutor(self.threads) if self.threads > 1 else None
+
+    def _view(self, gray, percentage):
+        if percentage <= 0.0:
+            return gray
+        h, w = gray.shape[:2]
+        border_h = int(h * percentage)
+        border_w = int(w * percentage)
+        return gray[border_h : h - border_h, border_w : w - border_w]
+
+    def is_valid(self, gray) -> bool:
+        # Same as thresholding.has_valid_pixels, with the threshold on the 8-bit scale
+        view = self._view(gray, self.border)
+        if view.size == 0:
+            return False
+        if gray.dtype == np.uint8:
+            # OpenCV compares 8-bit pixels against floor(threshold)
+            return int(view.max()) > np.floor(self.threshold)
+        return view.max() > self.threshold * full_scale(gray.dtype) / 255.0
+
+    def measure(self, frame: np.ndarray):
+        """
+        Returns the list of scores for the frame, or None if it has no valid pixels.
+        """
+        gray = to_gray(frame)
+        if not self.is_valid(gray):
+            return None
+        gray = self._view(gray, self.crop)
+        if self.scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return [scorer.score_gray(gray) for scorer in self.scorers]
+
+    def _measure_timed(self, frame: np.ndarray):
+        start = time.perf_counter()
+        scores = self.measure(frame)
+        return scores, time.perf_counter() - start
+
+    def measure_batch(self, frames, timed=False):
+        """
+        Measures each frame of the batch. When timed is set, returns (scores, seconds) pairs instead.
+        """
+        measure = self._measure_timed if timed else self.measure
+        if self._executor is None:
+            return [measure(frame) for frame in frames]
+        return list(self._executor.map(measure, frames))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
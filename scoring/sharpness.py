@@ -1,15 +1,21 @@
+from . import Scorer
 import numpy as np
+from thresholding import to_gray
 import cv2
 
-class SharpnessScorer:
+class SharpnessScorer(Scorer):
     def __init__(self):
         super().__init__()
 
     def score(self, frame):
         # Calculate sharpness of the image
         # Convert to gray scale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        # Calculate the Laplacian
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
+        gray = to_gray(frame)
+        return self.score_gray(gray)
+
+    def score_gray(self, gray):
+        # Calculate the Laplacian, which fits in 16 bits for 8-bit input
+        laplacian = cv2.Laplacian(gray, cv2.CV_16S if gray.dtype == np.uint8 else cv2.CV_32F)
         # Calculate the variance
-        return np.var(laplacian)
\ No newline at end of file
+        _, std = cv2.meanStdDev(laplacian)
+        return std[0, 0] ** 2
@@ -1,15 +1,22 @@
+from . import Scorer
 import numpy as np
-from thresholding import apply_threshold
+from thresholding import full_scale, to_gray
 import cv2
 
 
-class SmallestAreaScorer:
+class SmallestAreaScorer(Scorer):
     def __init__(self, threshold):
         super().__init__()
         self.threshold = threshold
 
     def score(self, frame):
-        moment = cv2.moments(apply_threshold(frame, self.threshold))
+        return self.score_gray(to_gray(frame))
+
+    def score_gray(self, gray):
+        # The threshold is on the 8-bit scale
+        scale = full_scale(gray.dtype)
+        _, thresholded = cv2.threshold(gray, self.threshold * scale / 255.0, scale, cv2.THRESH_TOZERO)
+        moment = cv2.moments(thresholded)
         m00 = moment["m00"]
         if m00 == 0:
             return 0.0
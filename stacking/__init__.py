@@ -8,4 +8,7 @@ class Stacker(object):
         pass
 
     def get_image(self) -> np.ndarray:
-        return None
\ No newline at end of file
+        return None
+
+    def close(self):
+        pass
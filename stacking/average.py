@@ -2,17 +2,53 @@ from . import Stacker
 import numpy as np
 
 class AverageStacker(Stacker):
-    def __init__(self):
+    """
+    Averages frames by accumulating them in place. The result has the dtype of the frames.
+    The accumulator is one of:
+    - "uint32": exact integer sums, for 8-bit frames (no overflow below about 16M frames)
+    - "float32": compensated (Kahan) summation
+    - "float64": plain double precision summation
+    - "auto": uint32 for 8-bit frames, float32 otherwise
+    """
+
+    def __init__(self, accumulator: str = "auto"):
         super().__init__()
+        self.accumulator = accumulator
         self._stack = None
+        self._compensation = None
+        self._buffers = None
         self._count = 0
+        self._dtype = None
+
+    def _create(self, frame: np.ndarray):
+        self._dtype = frame.dtype
+        accumulator = self.accumulator
+        if accumulator == "auto":
+            accumulator = "uint32" if frame.dtype == np.uint8 else "float32"
+        self._stack = np.zeros(frame.shape, dtype=np.dtype(accumulator))
+        if accumulator == "float32":
+            self._compensation = np.zeros(frame.shape, dtype=np.float32)
+            self._buffers = (
+                np.empty(frame.shape, dtype=np.float32),
+                np.empty(frame.shape, dtype=np.float32),
+            )
 
     def stack(self, frame: np.ndarray):
         if self._stack is None:
-            self._stack = frame.astype(np.float64, copy=False)
+            self._create(frame)
+
+        if self._compensation is None:
+            np.add(self._stack, frame, out=self._stack, casting="unsafe")
         else:
-            self._stack += frame
+            # Kahan summation, reusing preallocated buffers
+            y, t = self._buffers
+            np.subtract(frame, self._compensation, out=y, casting="unsafe")
+            np.add(self._stack, y, out=t)
+            np.subtract(t, self._stack, out=self._compensation)
+            np.subtract(self._compensation, y, out=self._compensation)
+            self._buffers = (y, self._stack)
+            self._stack = t
         self._count += 1
 
     def get_image(self) -> np.ndarray:
-        return (self._stack / self._count).astype(np.uint8)
\ No newline at end of file
+        return (self._stack / self._count).astype(self._dtype)
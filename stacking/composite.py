@@ -0,0 +1,28 @@
+from . import Stacker
+import numpy as np
+
+class CompositeStacker(Stacker):
+    """
+    Feeds every frame to several stackers, so multiple stack modes are computed in one pass.
+    stackers maps a name (such as the stack mode) to its Stacker.
+    """
+
+    def __init__(self, stackers: dict):
+        super().__init__()
+        self.stackers = stackers
+
+    def stack(self, frame: np.ndarray):
+        for stacker in self.stackers.values():
+            stacker.stack(frame)
+
+    def get_images(self) -> dict:
+        return {name: stacker.get_image() for name, stacker in self.stackers.items()}
+
+    def get_image(self) -> np.ndarray:
+        if not self.stackers:
+            return None
+        return next(iter(self.stackers.values())).get_image()
+
+    def close(self):
+        for stacker in self.stackers.values():
+            stacker.close()
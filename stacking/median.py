@@ -1,16 +1,87 @@
 from . import Stacker
 import numpy as np
+import tempfile
 
 class MedianStacker(Stacker):
-    def __init__(self):
+    """
+    Computes the per-pixel median of all stacked frames with bounded memory.
+    Frames are kept in memory until they exceed half of memory_limit bytes, after which they are
+    spilled to a temporary file. The median is then computed over horizontal tiles of the frame
+    cube, read from memory or from the spill file, sized so that the frames held in memory, the
+    tile and the float64 results of np.median together fit within memory_limit.
+    """
+
+    def __init__(self, memory_limit: int = 1 << 30, directory: str = None):
         super().__init__()
+        self.memory_limit = memory_limit
+        self.directory = directory
         self._frames = []
+        self._file = None
+        self._count = 0
+        self._shape = None
+        self._dtype = None
 
     def stack(self, frame: np.ndarray):
-        self._frames.append(frame.astype(np.float64))
+        if self._shape is None:
+            self._shape = frame.shape
+            self._dtype = frame.dtype
+        frame = np.ascontiguousarray(frame, dtype=self._dtype)
+        self._count += 1
+
+        if self._file is not None:
+            self._file.write(frame.data)
+            return
+
+        self._frames.append(frame)
+        # The other half of the budget is left for the tiles get_image reduces
+        if 2 * self._count * frame.nbytes > self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        self._file = tempfile.TemporaryFile(dir=self.directory)
+        for frame in self._frames:
+            self._file.write(frame.data)
+        self._frames = []
+
+    def _read_rows(self, top: int, rows: int) -> np.ndarray:
+        # Reads rows top to top + rows of every spilled frame into one tile
+        frame_bytes = int(np.prod(self._shape)) * self._dtype.itemsize
+        row_bytes = frame_bytes // self._shape[0]
+        tile = np.empty((self._count, rows) + self._shape[1:], dtype=self._dtype)
+        for i in range(self._count):
+            self._file.seek(i * frame_bytes + top * row_bytes)
+            if self._file.readinto(tile[i]) != rows * row_bytes:
+                raise IOError("Could not read the spilled frames.")
+        return tile
 
     def get_image(self) -> np.ndarray:
-        if not self._frames:
+        if self._count == 0:
             return None
-        stacked = np.stack(self._frames, axis=0)
-        return np.median(stacked, axis=0).astype(np.uint8)
+        if self._file is None:
+            budget = self.memory_limit // 2
+        else:
+            self._file.flush()
+            budget = self.memory_limit
+
+        # Per image row: the tile copied out of the frames, which np.median partitions in place,
+        # and about four float64 rows for its result and the temporaries that average the middle
+        # values
+        pixel_count = int(np.prod(self._shape[1:]))
+        row_bytes = (self._count * self._dtype.itemsize + 4 * 8) * pixel_count
+        rows = max(1, budget // row_bytes)
+        result = np.empty(self._shape, dtype=self._dtype)
+        for top in range(0, self._shape[0], rows):
+            rows = min(rows, self._shape[0] - top)
+            if self._file is None:
+                tile = np.stack([frame[top : top + rows] for frame in self._frames])
+            else:
+                tile = self._read_rows(top, rows)
+            result[top : top + rows] = np.median(tile, axis=0, overwrite_input=True)
+            del tile
+        return result
+
+    def close(self):
+        self._frames = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
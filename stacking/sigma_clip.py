@@ -0,0 +1,80 @@
+from . import Stacker
+import numpy as np
+import tempfile
+
+class SigmaClipStacker(Stacker):
+    """
+    Averages frames after rejecting per-pixel outliers (kappa-sigma clipping), such as satellite
+    and airplane trails.
+    While stacking, per-pixel sums are accumulated and every frame is spilled to a temporary
+    file. get_image then replays the spill once per iteration, keeping only the samples within
+    kappa standard deviations of the current mean. Memory use is proportional to the frame size,
+    not the number of frames.
+    """
+
+    def __init__(self, kappa: float = 2.5, iterations: int = 1, directory: str = None):
+        super().__init__()
+        self.kappa = kappa
+        self.iterations = max(1, iterations)
+        self.directory = directory
+        self._file = None
+        self._sum = None
+        self._sum_squares = None
+        self._count = 0
+        self._shape = None
+        self._dtype = None
+
+    def stack(self, frame: np.ndarray):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(dir=self.directory)
+            self._shape = frame.shape
+            self._dtype = frame.dtype
+            self._sum = np.zeros(frame.shape, dtype=np.float64)
+            self._sum_squares = np.zeros(frame.shape, dtype=np.float64)
+        frame = np.ascontiguousarray(frame, dtype=self._dtype)
+        self._file.write(frame.data)
+        self._sum += frame
+        self._sum_squares += np.square(frame, dtype=np.float64)
+        self._count += 1
+
+    def _statistics(self, total, total_squares, count):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            variance = np.maximum(total_squares / count - np.square(mean), 0.0)
+        return mean, np.sqrt(variance)
+
+    def get_image(self) -> np.ndarray:
+        if self._count == 0:
+            return None
+        self._file.flush()
+        frames = np.memmap(
+            self._file, dtype=self._dtype, mode="r", shape=(self._count,) + self._shape
+        )
+
+        mean, std = self._statistics(self._sum, self._sum_squares, self._count)
+        clipped_mean = mean
+        for _ in range(self.iterations):
+            # Tolerance keeps constant pixels (std == 0) from being rejected by rounding
+            limit = self.kappa * std + 1e-6
+            total = np.zeros(self._shape, dtype=np.float64)
+            total_squares = np.zeros(self._shape, dtype=np.float64)
+            count = np.zeros(self._shape, dtype=np.uint32)
+            for frame in frames:
+                frame = frame.astype(np.float64)
+                inliers = np.abs(frame - mean) <= limit
+                frame[~inliers] = 0.0
+                total += frame
+                total_squares += np.square(frame)
+                count += inliers
+
+            clipped_mean, std = self._statistics(total, total_squares, count)
+            # Pixels with every sample rejected keep the unclipped mean
+            clipped_mean = np.where(count > 0, clipped_mean, mean)
+            mean = clipped_mean
+        del frames
+        return clipped_mean.astype(self._dtype)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,67 @@
+from . import Stacker
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+class TiledStacker(Stacker):
+    """
+    Splits frames into tiles of at most tile_size x tile_size pixels, with a separate stacker per
+    tile created by stacker_factory, and stacks the tiles in parallel on a thread pool.
+    Every stacking method works per pixel, so tiles need no overlap. A memory_limit on the tile
+    stackers (as on MedianStacker) is divided between the tiles, so the tiles together stay
+    within it, and each tile spills and computes its result on its own, so buffers are bounded
+    by the tile size. The thread pool is kept until close.
+    """
+
+    def __init__(self, stacker_factory, tile_size: int = 1024, threads: int = 4):
+        super().__init__()
+        self.stacker_factory = stacker_factory
+        self.tile_size = tile_size
+        self.threads = max(1, threads)
+        self._executor = None
+        self._tiles = None  # list of (row slice, column slice, stacker)
+        self._shape = None
+
+    def _create_tiles(self, shape):
+        self._shape = shape
+        self._tiles = []
+        rows, cols = shape[:2]
+        for top in range(0, rows, self.tile_size):
+            for left in range(0, cols, self.tile_size):
+                self._tiles.append(
+                    (
+                        slice(top, min(top + self.tile_size, rows)),
+                        slice(left, min(left + self.tile_size, cols)),
+                        self.stacker_factory(),
+                    )
+                )
+        for _, _, stacker in self._tiles:
+            if hasattr(stacker, "memory_limit"):
+                stacker.memory_limit = max(1, stacker.memory_limit // len(self._tiles))
+
+    def _map(self, function):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.threads)
+        return self._executor.map(function, self._tiles)
+
+    def stack(self, frame: np.ndarray):
+        if self._tiles is None:
+            self._create_tiles(frame.shape)
+        list(self._map(lambda tile: tile[2].stack(frame[tile[0], tile[1]])))
+
+    def get_image(self) -> np.ndarray:
+        if self._tiles is None:
+            return None
+        result = None
+        for (rows, cols, _), image in zip(self._tiles, self._map(lambda tile: tile[2].get_image())):
+            if result is None:
+                result = np.empty(self._shape, dtype=image.dtype)
+            result[rows, cols] = image
+        return result
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._tiles is not None:
+            for _, _, stacker in self._tiles:
+                stacker.close()
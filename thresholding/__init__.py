@@ -2,15 +2,59 @@ import cv2
 import numpy as np
 
 
+def full_scale(dtype) -> float:
+    """
+    The value of a fully saturated pixel: 255 for 8-bit, 65535 for 16-bit and 1.0 for float frames.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        return 1.0
+    return float(np.iinfo(dtype).max)
+
+
+def to_gray(frame):
+    """
+    Converts a BGR frame to grayscale at its native depth.
+    """
+    if frame.dtype not in (np.uint8, np.uint16, np.float32):
+        frame = frame.astype(np.float32)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def to_depth(image, dtype):
+    """
+    Rescales an image to the full range of dtype. Returns the image itself if it already has that dtype.
+    """
+    dtype = np.dtype(dtype)
+    if image.dtype == dtype:
+        return image
+    alpha = full_scale(dtype) / full_scale(image.dtype)
+    if dtype == np.uint8:
+        return cv2.convertScaleAbs(image, alpha=alpha)
+    scaled = image.astype(np.float32) * alpha
+    if dtype.kind != "f":
+        scaled = np.clip(np.rint(scaled), 0, full_scale(dtype))
+    return scaled.astype(dtype)
+
+
+def to_uint8(image):
+    return to_depth(image, np.uint8)
+
+
 def apply_threshold(frame, threshold, binary=False):
-    converted_frame = cv2.cvtColor(frame.astype(np.uint8), cv2.COLOR_BGR2GRAY)
+    """
+    Thresholds the grayscale frame at its native depth and returns it as 8-bit.
+    The threshold is given on the 8-bit scale (0-255) and is scaled to the frame's depth.
+    """
+    converted_frame = to_gray(frame)
+    scale = full_scale(converted_frame.dtype)
     _, converted_frame = cv2.threshold(
         converted_frame,
-        threshold,
-        255,
+        threshold * scale / 255.0,
+        scale,
         cv2.THRESH_BINARY if binary else cv2.THRESH_TOZERO,
     )
-    return converted_frame
+    return to_uint8(converted_frame)
 
 
 def has_valid_pixels(frame, threshold, border_percentage=0.0):
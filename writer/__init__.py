@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+import threading
+
+
+class FrameWriter(object):
+    """
+    Encodes and writes frames to disk on a pool of background threads.
+    At most max_pending frames are queued; write blocks once that limit is reached.
+    Frames must not be modified after they are passed to write.
+    """
+
+    def __init__(self, threads: int = 2, max_pending: int = 16):
+        self._executor = ThreadPoolExecutor(max(1, threads))
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+
+    def _write(self, path: str, frame: np.ndarray):
+        try:
+            if not cv2.imwrite(path, frame):
+                print(f"Warning: Could not write frame to {path}.")
+        finally:
+            self._slots.release()
+
+    def write(self, path: str, frame: np.ndarray):
+        self._slots.acquire()
+        self._executor.submit(self._write, path, frame)
+
+    def close(self):
+        # Wait for all queued frames to be written
+        self._executor.shutdown(wait=True)